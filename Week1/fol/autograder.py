@@ -3,18 +3,23 @@ Autograder for First-Order Logic - Robinson's Resolution
 Tests the robinson.py implementation
 """
 
+import io
 import json
 import os
+import re
 import sys
 import traceback
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the module to test
 try:
-    from fol.robinson import robinson_resolution
+    from fol.robinson import robinson_resolution, apply_sub_literal
+    from fol.canonical import canonical
+    from fol.subsumption import SubsumptionIndex, subsumes
+    from fol.terms import parse_literal, parse_term
     IMPORT_SUCCESS = True
 except Exception as e:
     print(f"Error importing robinson.py: {e}")
@@ -35,12 +40,12 @@ class Colors:
     END = '\033[0m'
 
 
-def load_test_cases(filename: str = "testcases.json") -> List[Dict]:
+def load_test_cases(filename: str = "testcases.json", key: str = "test_cases") -> List[Dict]:
     """Load test cases from JSON file."""
     try:
         with open(filename, 'r') as f:
             data = json.load(f)
-            return data.get("test_cases", [])
+            return data.get(key, [])
     except FileNotFoundError:
         print(f"{Colors.RED}Error: {filename} not found{Colors.END}")
         return []
@@ -60,6 +65,115 @@ def format_clauses(clauses: List[List[str]]) -> str:
     return "\n  ".join(clause_strs)
 
 
+def check_proof(clauses: List[List[str]], proof: List) -> Optional[str]:
+    """
+    Replays a proof: every step must resolve two known clauses on
+    literals made complementary by its substitution, or factor one known
+    clause (c2 is None) on two literals its substitution makes equal, and
+    derive the clause it claims (up to variable names). Returns an error
+    or None.
+    """
+    derived = {canonical(parse_literal(l) for l in c) for c in clauses}
+    for k, (c1, c2, l1, l2, sub, resolvent) in enumerate(proof, 1):
+        c1 = [parse_literal(l) for l in c1]
+        if c2 is None:
+            s = {parse_term(v): parse_term(t) for v, t in sub.items()}
+            l1, l2 = parse_literal(l1), parse_literal(l2)
+            if canonical(c1) not in derived:
+                return f"step {k} factors a clause that was not derived before"
+            if l1 not in c1 or l2 not in c1 or apply_sub_literal(l1, s) is not apply_sub_literal(l2, s):
+                return f"step {k} does not factor on unified literals"
+            if canonical(apply_sub_literal(l, s) for l in c1) != canonical(parse_literal(l) for l in resolvent):
+                return f"step {k} derives {resolvent} instead of the factor"
+            derived.add(canonical(parse_literal(l) for l in resolvent))
+            continue
+        c2 = [parse_literal(l) for l in c2]
+        if canonical(c1) not in derived or canonical(c2) not in derived:
+            return f"step {k} resolves a clause that was not derived before"
+        s = {parse_term(v): parse_term(t) for v, t in sub.items()}
+        l1, l2 = parse_literal(l1), parse_literal(l2)
+        if l1 not in c1 or l2 not in c2 or apply_sub_literal(l1, s).negated() is not apply_sub_literal(l2, s):
+            return f"step {k} does not resolve on complementary literals"
+        expected = [apply_sub_literal(l, s) for l in c1 if l is not l1]
+        expected += [apply_sub_literal(l, s) for l in c2 if l is not l2]
+        if canonical(expected) != canonical(parse_literal(l) for l in resolvent):
+            return f"step {k} derives {resolvent} instead of the resolvent"
+        derived.add(canonical(parse_literal(l) for l in resolvent))
+    if not proof or proof[-1][-1]:
+        return "proof does not end in the empty clause"
+    return None
+
+
+def normalize_proof(proof: List) -> List:
+    """The proof with the literals of every clause sorted."""
+    return [(sorted(c1), c2 and sorted(c2), l1, l2, sub, sorted(c)) for c1, c2, l1, l2, sub, c in proof]
+
+
+_TSTP_TOKEN = re.compile(r"'(?:[^'\\]|\\.)*'|[A-Za-z0-9_$]+|\S")
+
+
+def from_tstp(clause: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    A TSTP clause as literals in this tree's syntax, or an error. Variables
+    must start with an uppercase letter and every unquoted name must be a
+    TSTP lower word; quoted names are unquoted.
+    """
+    if clause == "$false":
+        return [], None
+    tokens = _TSTP_TOKEN.findall(clause)
+    literals, current = [], []
+    for i, tok in enumerate(tokens):
+        applied = i + 1 < len(tokens) and tokens[i + 1] == "("
+        if tok.startswith("'"):
+            current.append(re.sub(r"\\(.)", r"\1", tok[1:-1]))
+        elif tok[0].isupper():
+            if applied:
+                return None, f"variable {tok} applied to arguments"
+            current.append(tok.lower())
+        elif tok[0].islower():
+            if not applied or not re.fullmatch(r"[a-z][A-Za-z0-9_]*", tok):
+                return None, f"{tok} is neither an uppercase variable nor a function name"
+            current.append(tok)
+        elif tok == "|":
+            literals.append("".join(current))
+            current = []
+        elif tok in "(),~":
+            current.append(tok)
+        else:
+            return None, f"unexpected token {tok!r}"
+    literals.append("".join(current))
+    return literals, None
+
+
+def check_tstp(text: str, clauses: List[List[str]]) -> Optional[str]:
+    """
+    Checks a streamed proof: TSTP syntax (uppercase variables, quoted
+    names), axioms that are input clauses, parents before children,
+    ending in $false.
+    """
+    inputs = {canonical(parse_literal(l) for l in c) for c in clauses}
+    seen = set()
+    lines = text.splitlines()
+    for line in lines:
+        m = re.match(r"cnf\((c\d+), (axiom|plain), \((.*?)\)(?:, inference\((resolution|factor), \[status\(thm\)\], \[(c\d+)(?:, (c\d+))?\]\))?\)\.$", line)
+        if m is None:
+            return f"malformed line: {line}"
+        name, role, clause, rule, p1, p2 = m.groups()
+        literals, error = from_tstp(clause)
+        if error is not None:
+            return f"{name}: {error}"
+        if role == "axiom" and canonical(parse_literal(l) for l in literals) not in inputs:
+            return f"axiom {name} is not an input clause"
+        if role == "plain" and (rule is None or (p2 is None) != (rule == "factor")):
+            return f"malformed inference: {line}"
+        if role == "plain" and (p1 not in seen or (p2 is not None and p2 not in seen)):
+            return f"parents of {name} are not written before it"
+        seen.add(name)
+    if not lines or "($false)" not in lines[-1]:
+        return "proof does not end in $false"
+    return None
+
+
 def test_robinson(test_case: Dict) -> Tuple[bool, str, float]:
     """
     Test a single Robinson resolution case.
@@ -73,19 +187,43 @@ def test_robinson(test_case: Dict) -> Tuple[bool, str, float]:
     description = test_case.get("description", "No description")
     clauses = test_case.get("clauses", [])
     expected_result = test_case.get("expected_result", "UNSAT")
-    max_iterations = test_case.get("max_iterations", 1000)
+    max_iterations = test_case.get("max_iterations", 1000)    # given clauses, not rounds
+    time_limit = test_case.get("time_limit")
+    
+    options = dict(test_case.get("options", {}))
     
     try:
+        out = io.StringIO() if options.pop("proof_out", False) else None
         start_time = time.time()
-        result, proof = robinson_resolution(clauses, max_iterations=max_iterations)
+        result, proof = robinson_resolution(clauses, max_iterations=max_iterations,
+                                            proof_out=out, **options)
         execution_time = time.time() - start_time
         
+        if result == "UNSAT":
+            error = check_tstp(out.getvalue(), clauses) if out is not None else check_proof(clauses, proof)
+            if error is not None:
+                return False, f"✗ Invalid proof: {error}", execution_time
+        if options.get("workers", 0) > 1:
+            # the workers must not change the outcome
+            sequential = dict(options, workers=0)
+            out_again = io.StringIO() if out is not None else None
+            again = robinson_resolution(clauses, max_iterations=max_iterations,
+                                        proof_out=out_again, **sequential)
+            if (again[0] != result or normalize_proof(again[1]) != normalize_proof(proof)
+                    or (out is not None and out_again.getvalue() != out.getvalue())):
+                return False, "✗ Result differs from the run without workers", execution_time
+        
+        if time_limit is not None and execution_time > time_limit:
+            return False, f"✗ Took longer than {time_limit}s", execution_time
+        
         # Check if result matches expected
         if result == expected_result:
             message = f"✓ Correct result: {result}"
             if result == "UNSAT":
                 if proof and len(proof) > 0:
                     message += f" (proof length: {len(proof)})"
+                elif out is not None:
+                    message += f" (streamed proof: {len(out.getvalue().splitlines())} lines)"
                 else:
                     message += " (warning: empty proof)"
             return True, message, execution_time
@@ -102,6 +240,24 @@ def test_robinson(test_case: Dict) -> Tuple[bool, str, float]:
         return False, f"✗ Exception: {error_msg}", 0.0
 
 
+def test_subsumption(test_case: Dict) -> Tuple[bool, str]:
+    """Checks subsumes() and both SubsumptionIndex queries on one pair."""
+    c = canonical(parse_literal(l) for l in test_case["subsumer"])
+    d = frozenset(parse_literal(l) for l in test_case["clause"])
+    expected = test_case["expected"]
+    try:
+        forward = SubsumptionIndex()
+        forward.add(c)
+        backward = SubsumptionIndex()
+        backward.add(d)
+        answers = (subsumes(c, d), forward.subsuming(d) is not None, d in backward.subsumed(c))
+    except Exception as e:
+        return False, f"✗ Exception: {e}"
+    if answers != (expected,) * 3:
+        return False, f"✗ Expected {expected}, got subsumes/forward/backward = {answers}"
+    return True, f"✓ Correct result: {expected}"
+
+
 def run_test_suite():
     """Run all FOL Robinson resolution tests."""
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}")
@@ -138,6 +294,18 @@ def run_test_suite():
         if passed:
             total_passed += 1
     
+    # Subsumption checks
+    sub_cases = load_test_cases(key="subsumption_cases")
+    print(f"{Colors.BOLD}{Colors.CYAN}  Subsumption{Colors.END}\n")
+    for test in sub_cases:
+        passed, message = test_subsumption(test)
+        status_color = Colors.GREEN if passed else Colors.RED
+        print(f"{status_color}Subsumption {test['id']}: {test['description']}{Colors.END}")
+        print(f"  {message}\n")
+        if passed:
+            total_passed += 1
+    total_tests += len(sub_cases)
+    
     # Print summary
     print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}")
     print(f"{Colors.BOLD}{Colors.CYAN}  Summary{Colors.END}")
@@ -0,0 +1,178 @@
+"""
+Canonical variable naming for clauses.
+
+Every clause is stored with its variables renamed to x0, x1, ... in a
+canonical order. Two clauses that differ only in their variable names
+(variants) then become the same frozenset, and one of them is dropped as
+a duplicate.
+
+The numbering follows an order of the literals. Ground literals have no
+variables and are left out. The others are sorted by shape: the literal
+with every variable written as "?". Variables are numbered in order of
+first appearance. Most clauses have no two literals of the same shape
+and are numbered in one pass.
+
+Literals of equal shape need a search. At each step the next literal is
+the smallest once its numbered variables are written as their numbers.
+Ties are broken by trying each tied literal, and the smallest complete
+order wins. Of the tied literals whose new variables occur nowhere else,
+only one is tried. A branch that is already larger than the best order
+is cut off.
+
+The search stops after _MAX_LEAVES complete orders. Past that cap, two
+variants may still get different names; subsumption catches them. The
+result depends only on the set of literals, not on their given order.
+
+Every stored clause uses x0..x(n-1), so clauses are standardized apart
+for resolution by shifting the variables of one side past those of the
+other (shift()), without generating names.
+"""
+
+import itertools
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from .terms import Fn, Literal, Term, Var
+
+Clause = FrozenSet[Literal]
+
+_MAX_LEAVES = 64
+_names: List[Var] = []
+
+
+def var(i: int) -> Var:
+    """The i-th canonical variable, xi."""
+    while len(_names) <= i:
+        _names.append(Var(f"x{len(_names)}"))
+    return _names[i]
+
+
+def _variables(l: Literal) -> List[Var]:
+    """Variables of l in order of first appearance."""
+    out = []
+    todo = list(reversed(l.args))
+    while todo:
+        t = todo.pop()
+        if isinstance(t, Fn):
+            if not t.ground:
+                todo.extend(reversed(t.args))
+        elif t not in out:
+            out.append(t)
+    return out
+
+
+def _shape(l: Literal) -> Tuple:
+    """l with every variable written as "?"; the same for all variants of l."""
+    tokens = [l.neg, l.pred]
+    todo = list(reversed(l.args))
+    while todo:
+        t = todo.pop()
+        if isinstance(t, Fn):
+            tokens.append(f"{t.name}/{len(t.args)}")
+            todo.extend(reversed(t.args))
+        else:
+            tokens.append("?")
+    return tuple(tokens)
+
+
+def _signature(l: Literal, numbering: Dict[Var, int]) -> Tuple:
+    """l written with numbered variables as numbers and the rest by order of appearance."""
+    tokens = [l.neg, l.pred]
+    fresh = {}
+    todo = list(reversed(l.args))
+    while todo:
+        t = todo.pop()
+        if isinstance(t, Fn):
+            tokens.append(f"{t.name}/{len(t.args)}")
+            todo.extend(reversed(t.args))
+        elif t in numbering:
+            tokens.append(f"#{numbering[t]}")
+        else:
+            tokens.append(f"?{fresh.setdefault(t, len(fresh))}")
+    return tuple(tokens)
+
+
+def canonical(literals: Iterable[Literal]) -> Clause:
+    """The clause of literals, with its variables renamed canonically."""
+    lits = list(dict.fromkeys(literals))
+    # ground literals have no variables to number
+    ground = [l for l in lits if l.ground]
+    lits = [l for l in lits if not l.ground]
+    shapes = {l: _shape(l) for l in lits}
+    lits.sort(key=shapes.__getitem__)
+    groups = [list(g) for _, g in itertools.groupby(lits, key=shapes.__getitem__)]
+    if len(groups) == len(lits):
+        numbering = {}
+        for l in lits:
+            for v in _variables(l):
+                numbering.setdefault(v, len(numbering))
+        return _renumbered(lits, numbering, ground)
+
+    # tied literals whose new variables occur nowhere else are
+    # interchangeable: trying one of them is enough
+    groups = [sorted(g, key=str) for g in groups]
+    uses = {}
+    for l in lits:
+        for v in _variables(l):
+            uses[v] = uses.get(v, 0) + 1
+    best = None
+    best_numbering = {}
+    leaves = 0
+    # (index of the group being placed, its literals still to place, numbering, signature so far)
+    stack = [(0, groups[0], {}, ())]
+    while stack and leaves < _MAX_LEAVES:
+        g, remaining, numbering, sig = stack.pop()
+        if not remaining:
+            g += 1
+            if g == len(groups):
+                leaves += 1
+                if best is None or sig < best:
+                    best, best_numbering = sig, numbering
+                continue
+            remaining = groups[g]
+        sigs = [_signature(l, numbering) for l in remaining]
+        low = min(sigs)
+        if best is not None and sig + (low,) > best[:len(sig) + 1]:
+            continue    # every order below this node is larger than the best one
+        tied = [i for i in range(len(remaining)) if sigs[i] == low]
+        if len(tied) > 1:
+            isolated = [i for i in tied if all(uses[v] == 1 for v in _variables(remaining[i])
+                                               if v not in numbering)]
+            tied = [i for i in tied if i not in isolated] + isolated[:1]
+        for i in reversed(tied):
+            extended = dict(numbering)
+            for v in _variables(remaining[i]):
+                extended.setdefault(v, len(extended))
+            stack.append((g, remaining[:i] + remaining[i + 1:], extended, sig + (low,)))
+    return _renumbered(lits, best_numbering, ground)
+
+
+def _renumbered(lits: List[Literal], numbering: Dict[Var, int], ground: List[Literal]) -> Clause:
+    sub = {v: var(i) for v, i in numbering.items()}
+    renamed = [Literal(l.neg, l.pred, tuple(_rename(a, sub) for a in l.args)) for l in lits]
+    return frozenset(renamed + ground)
+
+
+def _rename(t: Term, sub: Dict[Var, Var]) -> Term:
+    if isinstance(t, Var):
+        return sub.get(t, t)
+    if t.ground:
+        return t
+    return Fn(t.name, tuple(_rename(a, sub) for a in t.args))
+
+
+def width(clause: Clause) -> int:
+    """Number of variables of a canonical clause."""
+    seen = set()
+    for l in clause:
+        seen.update(_variables(l))
+    return len(seen)
+
+
+def shift(clause: Clause, k: int) -> Tuple[Clause, Dict[Literal, Literal]]:
+    """
+    clause with xi renamed to x(i+k), and a map from its literals to the
+    renamed ones.
+    """
+    sub = {var(i): var(i + k) for i in range(width(clause))}
+    renamed = {l: Literal(l.neg, l.pred, tuple(_rename(a, sub) for a in l.args)) for l in clause}
+    return frozenset(renamed.values()), renamed
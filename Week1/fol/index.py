@@ -0,0 +1,125 @@
+"""
+Discrimination tree over the literals of the active clauses.
+
+A literal is stored under its sign, predicate and arity, then the preorder
+listing of its argument terms, where a function symbol is keyed by name
+and arity and every variable by "*". Retrieval walks the tree along a
+query literal: a "*" in the tree skips one whole subterm of the query, and
+a variable in the query skips one whole stored subterm. What comes back
+is a superset of the literals unifiable with the query (repeated variables
+are not checked), so callers still run unify on each candidate, but
+literals with another predicate, sign or clashing function symbol are
+never looked at.
+"""
+
+from typing import Dict, FrozenSet, Iterator, List, Tuple
+
+from .terms import Fn, Literal, Term
+
+Clause = FrozenSet[Literal]
+
+_VAR = "*"
+
+
+def _preorder(args: Tuple[Term, ...]) -> List:
+    keys = []
+    todo = list(reversed(args))
+    while todo:
+        t = todo.pop()
+        if isinstance(t, Fn):
+            keys.append((t.name, len(t.args)))
+            todo.extend(reversed(t.args))
+        else:
+            keys.append(_VAR)
+    return keys
+
+
+def _skip_ends(keys: List) -> List[int]:
+    """ends[i] is the position just after the subterm starting at keys[i]."""
+    ends = [0] * len(keys)
+    for i in range(len(keys) - 1, -1, -1):
+        j = i + 1
+        if keys[i] != _VAR:
+            for _ in range(keys[i][1]):
+                j = ends[j]
+        ends[i] = j
+    return ends
+
+
+def _after_one_term(node: Dict) -> Iterator[Dict]:
+    """Nodes reached from node by reading exactly one stored term."""
+    todo = [(node, 1)]
+    while todo:
+        n, pending = todo.pop()
+        if pending == 0:
+            yield n
+            continue
+        for key, child in n.items():
+            if key is None:
+                continue
+            todo.append((child, pending - 1 if key == _VAR else pending - 1 + key[1]))
+
+
+class LiteralIndex:
+    def __init__(self):
+        self.roots = {}     # (sign, predicate, arity) -> tree; leaves map (literal, clause) -> None
+
+    def _path(self, l: Literal) -> Tuple[Tuple[bool, str, int], List]:
+        return (l.neg, l.pred, len(l.args)), _preorder(l.args)
+
+    def add(self, clause: Clause) -> None:
+        for l in clause:
+            root, keys = self._path(l)
+            node = self.roots.setdefault(root, {})
+            for key in keys:
+                node = node.setdefault(key, {})
+            node.setdefault(None, {})[(l, clause)] = None
+
+    def remove(self, clause: Clause) -> None:
+        for l in clause:
+            root, keys = self._path(l)
+            path = [self.roots.get(root)]
+            for key in keys:
+                if path[-1] is None:
+                    break
+                path.append(path[-1].get(key))
+            leaf = path[-1] and path[-1].get(None)
+            if not leaf:
+                continue
+            leaf.pop((l, clause), None)
+            if leaf:
+                continue
+            # prune the branch that only led to this literal
+            del path[-1][None]
+            for i in range(len(keys) - 1, -1, -1):
+                if path[i + 1]:
+                    break
+                del path[i][keys[i]]
+            else:
+                if not path[0]:
+                    del self.roots[root]
+
+    def unifiable(self, l: Literal) -> Iterator[Tuple[Literal, Clause]]:
+        """(literal, clause) for the stored literals that may unify with l."""
+        root = self.roots.get((l.neg, l.pred, len(l.args)))
+        if root is None:
+            return
+        keys = _preorder(l.args)
+        ends = _skip_ends(keys)
+        todo = [(root, 0)]
+        while todo:
+            node, i = todo.pop()
+            if i == len(keys):
+                yield from node.get(None, ())
+                continue
+            key = keys[i]
+            if key == _VAR:
+                for n in _after_one_term(node):
+                    todo.append((n, i + 1))
+                continue
+            child = node.get(key)
+            if child is not None:
+                todo.append((child, i + 1))
+            child = node.get(_VAR)
+            if child is not None:
+                todo.append((child, ends[i]))
@@ -0,0 +1,139 @@
+"""
+Resolution steps for the given-clause loop, spread over worker processes.
+
+The n-th clause to become active goes to worker n % workers, which keeps
+it in its own LiteralIndex; each given clause is sent to all workers.
+The steps coming back are sorted by the partner's activation number and
+the literals resolved upon, so a run does not depend on the number of
+workers or on which one answers first. Pickled term trees are interned
+again on unpickling, so identity comparisons keep working.
+"""
+
+import multiprocessing
+import os
+import queue
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .index import LiteralIndex
+from .terms import Literal
+
+Clause = FrozenSet[Literal]
+
+_POLL = 1.0     # seconds between liveness checks while waiting for answers
+
+
+def _worker(wid, tasks, results):
+    from .robinson import resolutions
+
+    index = LiteralIndex()
+    seqs = {}       # clause -> activation number
+    error = None    # reported with the next answer, which is the only reply expected
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        try:
+            if task[0] == "add":
+                _, seq, clause = task
+                seqs[clause] = seq
+                index.add(clause)
+            elif task[0] == "remove":
+                clause = task[1]
+                del seqs[clause]
+                index.remove(clause)
+            elif error is not None:
+                results.put((wid, error))
+            else:
+                out = [(seqs[partner], l1, l2, sub, resolvent)
+                       for l1, l2, partner, sub, resolvent in resolutions(task[1], index)]
+                results.put((wid, out))
+        except Exception as e:
+            if task[0] == "resolve":
+                results.put((wid, e))
+            else:
+                error = e
+
+
+class ResolverPool:
+    """Drop-in for the active-clause LiteralIndex, plus resolve()."""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.tasks = [multiprocessing.Queue() for _ in range(self.workers)]
+        self.results = multiprocessing.Queue()
+        self.procs = [multiprocessing.Process(target=_worker, daemon=True,
+                                              args=(wid, tasks, self.results))
+                      for wid, tasks in enumerate(self.tasks)]
+        for p in self.procs:
+            p.start()
+        self.seqs = {}          # clause -> activation number
+        self.clauses = {}       # activation number -> clause
+        self.next_seq = 0
+
+    def add(self, clause: Clause) -> None:
+        seq = self.next_seq
+        self.next_seq += 1
+        self.seqs[clause] = seq
+        self.clauses[seq] = clause
+        self.tasks[seq % self.workers].put(("add", seq, clause))
+
+    def remove(self, clause: Clause) -> None:
+        seq = self.seqs.pop(clause)
+        del self.clauses[seq]
+        self.tasks[seq % self.workers].put(("remove", clause))
+
+    def resolve(self, given: Clause) -> List[Tuple[Literal, Literal, Clause, Dict, Clause]]:
+        """(l1, l2, partner, mgu, resolvent) for given against every active clause."""
+        for tasks in self.tasks:
+            tasks.put(("resolve", given))
+        steps, error = [], None
+        answered = set()
+        while len(answered) < self.workers:
+            wid, out = self._answer(answered)
+            answered.add(wid)
+            if isinstance(out, Exception):
+                error = out
+            else:
+                steps.extend(out)
+        if error is not None:
+            raise error
+        steps.sort(key=lambda s: (s[0], str(s[1]), str(s[2])))
+        return [(l1, l2, self.clauses[seq], sub, resolvent)
+                for seq, l1, l2, sub, resolvent in steps]
+
+    def _answer(self, answered) -> Tuple[int, object]:
+        """
+        The next (wid, answer). Raises RuntimeError, after terminating the
+        pool, once a worker not in answered has died.
+        """
+        while True:
+            try:
+                return self.results.get(timeout=_POLL)
+            except queue.Empty:
+                pass
+            dead = [(wid, p.exitcode) for wid, p in enumerate(self.procs)
+                    if wid not in answered and not p.is_alive()]
+            if dead:
+                try:
+                    # an answer sent just before the worker exited
+                    return self.results.get(timeout=_POLL)
+                except queue.Empty:
+                    self.terminate()
+                    wid, code = dead[0]
+                    raise RuntimeError(f"resolution worker {wid} died (exit code {code})")
+
+    def terminate(self) -> None:
+        for p in self.procs:
+            if p.is_alive():
+                p.terminate()
+        for p in self.procs:
+            p.join()
+
+    def close(self) -> None:
+        for tasks in self.tasks:
+            tasks.put(None)
+        for p in self.procs:
+            p.join(timeout=1)
+            if p.is_alive():
+                p.terminate()
+                p.join()
@@ -0,0 +1,75 @@
+"""
+Passive clause queue for the given-clause loop.
+
+Clauses wait here until they are selected as the given clause. Selection
+alternates between the lightest clause (fewest symbols) and the oldest
+one: out of every pick_ratio + 1 selections, pick_ratio go by weight and
+one by age. Picking by weight finds short proofs quickly, and the age
+picks guarantee that every clause is selected eventually.
+"""
+
+import heapq
+from typing import FrozenSet, Optional
+
+from .terms import Fn, Literal
+
+Clause = FrozenSet[Literal]
+
+
+def clause_weight(clause: Clause) -> int:
+    """Number of symbols: predicates, function symbols and variables."""
+    weight = 0
+    for l in clause:
+        weight += 1
+        todo = list(l.args)
+        while todo:
+            t = todo.pop()
+            weight += 1
+            if isinstance(t, Fn):
+                todo.extend(t.args)
+    return weight
+
+
+class PassiveQueue:
+    def __init__(self, pick_ratio: int = 5):
+        if pick_ratio < 0:
+            raise ValueError(f"pick_ratio must be >= 0: {pick_ratio}")
+        self.pick_ratio = pick_ratio
+        self.by_weight = []     # (weight, age, clause)
+        self.by_age = []        # (age, clause)
+        self.queued = set()     # clauses still waiting; the heaps skip the rest
+        self.age = 0
+        self.picks = 0
+
+    def __len__(self) -> int:
+        return len(self.queued)
+
+    def __contains__(self, clause: Clause) -> bool:
+        return clause in self.queued
+
+    def push(self, clause: Clause) -> None:
+        if clause in self.queued:
+            return
+        self.queued.add(clause)
+        heapq.heappush(self.by_weight, (clause_weight(clause), self.age, clause))
+        heapq.heappush(self.by_age, (self.age, clause))
+        self.age += 1
+
+    def discard(self, clause: Clause) -> None:
+        """Drops a clause without selecting it."""
+        self.queued.discard(clause)
+
+    def pop(self) -> Optional[Clause]:
+        """The next given clause, or None if the queue is empty."""
+        if not self.queued:
+            return None
+        self.picks += 1
+        if self.picks % (self.pick_ratio + 1) == 0:
+            heap, pos = self.by_age, 1
+        else:
+            heap, pos = self.by_weight, 2
+        while True:
+            clause = heapq.heappop(heap)[pos]
+            if clause in self.queued:
+                self.queued.remove(clause)
+                return clause
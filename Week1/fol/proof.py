@@ -0,0 +1,179 @@
+"""
+Derivation records for the resolution prover.
+
+Every clause the prover keeps or derives gets an integer id. A derived
+clause is recorded as five integers in parallel arrays: the ids of the
+given clause and the partner, the positions of the literals resolved
+upon within them, and the shift applied to the given clause's variables.
+A factor is recorded the same way, with its one parent as the given
+clause, _FACTOR as the partner and the positions of the two literals
+merged within the parent. The renamed clause, the literals and the
+unifier are not stored; steps() recomputes them, for the clauses of one
+proof only, once the empty clause has been found. The unifier comes out
+the same because unification is deterministic.
+
+write_tstp() streams a proof as one TSTP cnf(...) line per clause,
+parents before children, so a long proof is never built up as a list.
+Literals are written in TSTP syntax: variables start with an uppercase
+letter (x0 becomes X0), and a predicate, function or constant name is
+single-quoted unless it is a TSTP lower word (a lowercase letter
+followed by letters, digits and underscores), so the constant A is 'A'.
+"""
+
+import re
+from array import array
+from typing import Dict, FrozenSet, Iterator, List, Optional, TextIO, Tuple
+
+from .canonical import shift
+from .terms import Literal, Term, Var
+from .unify import unify_args
+
+Clause = FrozenSet[Literal]
+
+_INPUT = -1
+_FACTOR = -2
+
+_LOWER_WORD = re.compile(r"[a-z][A-Za-z0-9_]*\Z")
+
+
+def _tstp_name(name: str) -> str:
+    if _LOWER_WORD.match(name):
+        return name
+    return "'" + name.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _tstp_literal(l: Literal) -> str:
+    """l in TSTP syntax, written without recursion."""
+    out = []
+    stack = [l]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, str):
+            out.append(x)
+            continue
+        if isinstance(x, Var):
+            # stored clauses only have the canonical variables x0, x1, ...
+            out.append(x.name.upper())
+            continue
+        if isinstance(x, Literal):
+            if x.neg:
+                out.append("~")
+            name = x.pred
+        else:
+            name = x.name
+        out.append(_tstp_name(name))
+        if not x.args:
+            continue
+        out.append("(")
+        stack.append(")")
+        for i in range(len(x.args) - 1, -1, -1):
+            stack.append(x.args[i])
+            if i:
+                stack.append(",")
+    return "".join(out)
+
+
+class ProofStore:
+    def __init__(self):
+        self.clauses: List[Clause] = []
+        self.ids: Dict[Clause, int] = {}
+        self.given = array("i")     # id of the given clause, _INPUT for inputs
+        self.partner = array("i")     # id of the partner, _FACTOR for factors
+        self.given_pos = array("i")     # position of the literal in tuple(clause)
+        self.partner_pos = array("i")
+        self.offset = array("i")        # variable shift applied to the given clause
+
+    def __len__(self) -> int:
+        return len(self.clauses)
+
+    def __contains__(self, clause: Clause) -> bool:
+        return clause in self.ids
+
+    def _record(self, clause: Clause, given: int, partner: int, given_pos: int,
+                partner_pos: int, offset: int) -> int:
+        cid = len(self.clauses)
+        self.clauses.append(clause)
+        self.ids[clause] = cid
+        self.given.append(given)
+        self.partner.append(partner)
+        self.given_pos.append(given_pos)
+        self.partner_pos.append(partner_pos)
+        self.offset.append(offset)
+        return cid
+
+    def add_input(self, clause: Clause) -> int:
+        return self._record(clause, _INPUT, _INPUT, 0, 0, 0)
+
+    def add(self, clause: Clause, given: Clause, l1: Literal, partner: Clause,
+            l2: Literal, offset: int) -> int:
+        """
+        Records clause as resolved from given (shifted by offset) on l1 and
+        partner on l2; l1 is the literal of given before the shift.
+        """
+        g, p = self.ids[given], self.ids[partner]
+        return self._record(clause, g, p, tuple(self.clauses[g]).index(l1),
+                            tuple(self.clauses[p]).index(l2), offset)
+
+    def add_factor(self, clause: Clause, parent: Clause, l1: Literal, l2: Literal) -> int:
+        """Records clause as the factor of parent merging l1 and l2."""
+        p = self.ids[parent]
+        lits = tuple(parent)
+        return self._record(clause, p, _FACTOR, lits.index(l1), lits.index(l2), 0)
+
+    def is_input(self, cid: int) -> bool:
+        return self.given[cid] == _INPUT
+
+    def is_factor(self, cid: int) -> bool:
+        return self.partner[cid] == _FACTOR
+
+    def derivation(self, cid: int) -> Iterator[int]:
+        """Ids of cid and its ancestors, parents before children."""
+        done = set()
+        stack = [(cid, False)]
+        while stack:
+            c, expanded = stack.pop()
+            if expanded:
+                yield c
+                continue
+            if c in done:
+                continue
+            done.add(c)
+            stack.append((c, True))
+            if not self.is_input(c):
+                if not self.is_factor(c):
+                    stack.append((self.partner[c], False))
+                stack.append((self.given[c], False))
+
+    def step(self, cid: int) -> Tuple[Clause, Optional[Clause], Literal, Literal, Dict[Var, Term], Clause]:
+        """
+        (renamed given, partner, l1, l2, mgu, clause) for a derived clause;
+        (parent, None, l1, l2, mgu, clause) for a factor.
+        """
+        given = self.clauses[self.given[cid]]
+        if self.is_factor(cid):
+            lits = tuple(given)
+            l1, l2 = lits[self.given_pos[cid]], lits[self.partner_pos[cid]]
+            return given, None, l1, l2, unify_args(l1.args, l2.args), self.clauses[cid]
+        partner = self.clauses[self.partner[cid]]
+        renamed, renaming = shift(given, self.offset[cid])
+        l1 = renaming[tuple(given)[self.given_pos[cid]]]
+        l2 = tuple(partner)[self.partner_pos[cid]]
+        return renamed, partner, l1, l2, unify_args(l1.args, l2.args), self.clauses[cid]
+
+    def steps(self, cid: int) -> Iterator[Tuple]:
+        """step() for every derived clause in the derivation of cid."""
+        for c in self.derivation(cid):
+            if not self.is_input(c):
+                yield self.step(c)
+
+    def write_tstp(self, cid: int, out: TextIO) -> None:
+        for c in self.derivation(cid):
+            clause = " | ".join(sorted(_tstp_literal(l) for l in self.clauses[c])) or "$false"
+            if self.is_input(c):
+                out.write(f"cnf(c{c}, axiom, ({clause})).\n")
+            elif self.is_factor(c):
+                out.write(f"cnf(c{c}, plain, ({clause}), "
+                          f"inference(factor, [status(thm)], [c{self.given[c]}])).\n")
+            else:
+                out.write(f"cnf(c{c}, plain, ({clause}), "
+                          f"inference(resolution, [status(thm)], [c{self.given[c]}, c{self.partner[c]}])).\n")
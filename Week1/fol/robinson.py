@@ -1,281 +1,301 @@
 """
 First-Order Logic - Robinson's Resolution Algorithm
 Implement the Robinson resolution algorithm for FOL theorem proving.
+
+Clauses are parsed once into interned terms (see terms.py); everything
+below works on those and only build_proof turns them back into strings.
 """
 
-from typing import List, Tuple
-
-# whether a variable or not
-def is_var(x:str):
-    return x and x[0].islower() and (x.find("(")==-1)
-
-def is_func(x:str):
-    if (is_var(x)):
-        return False, "", []
-    
-    if x and x.find("(") != -1:
-        _ , func , args = get_literal(x)
-        return True, func, args
-    
-    return False, "", []
-
-
-
-# gives whether negation, predicate name and its arguments
-def get_literal(t:str):
-    neg = t.startswith("~")
-    if neg:
-        t = t[1:]
-    predicate = t[0:t.find("(")]
-    arguments = t[t.find("(")+1:-1]
-    args = []
-    depth = 0
-    curr = ""
-    for c in arguments:
-        if c=='(':
-            depth += 1
-        elif c==')':
-            depth -= 1
-
-        if c!=',':
-            curr += c
-        if depth==0 and c==',':
-            args.append(curr)
-            curr = ""
-    args.append(curr)
-        
-    return neg, predicate, args
-
-
-# applies substitution on a term
-def apply_sub_term(t, sub):
-    fu, name, arg = is_func(t)
-    if fu:
-        new_args = [apply_sub_term(a,sub) for a in arg]
-        s = f"{name}({','.join(new_args)})"
-        return s
-
-    while t in sub:
-        t = sub[t]
-    return t
+import itertools
+from typing import Dict, FrozenSet, Iterable, List, Optional, TextIO, Tuple
+
+from .canonical import canonical, shift, width
+from .index import LiteralIndex
+from .parallel import ResolverPool
+from .passive import PassiveQueue
+from .proof import ProofStore
+from .subsumption import SubsumptionIndex
+from .terms import Literal, Term, Var, parse_literal
+from .unify import solved, substitute, unify_args
+
+Subst = Dict[Var, Term]
+
+
+# applies substitution on a term; sub may be triangular (see unify.py)
+apply_sub_term = substitute
 
 # apply substitution on a literal -> i.e. a predicate
-def apply_sub_literal(t, sub):
-    neg, pred, args = get_literal(t)
-    new_args = [apply_sub_term(a, sub) for a in args]
-    s = f"{pred}({','.join(new_args)})"
-    return "~" + s if neg else s
-
-def inside(t1,t2):
-    f1,n1,a1 = is_func(t1)
-    if f1 and t2 in a1:
-        return True
-    return False
-
-def uni_terms(t1,t2,sub):
-    t1 = apply_sub_term(t1,sub)
-    t2 = apply_sub_term(t2,sub)
-
-    if t1==t2:
-        return sub
-    
-    if inside(t2,t1) or inside(t1,t2):
-        return None
-    
-    elif is_var(t1):
-        sub[t1] = t2
-        for k in sub: # Propagate the new substitution
-            if k != t1: 
-                sub[k] = apply_sub_term(sub[k], {t1: t2})
-        return sub
-    
-    elif is_var(t2):
-        sub[t2] = t1
-        for k in sub: # Propagate the new substitution
-            if k != t2: 
-                sub[k] = apply_sub_term(sub[k], {t2: t1})
-        return sub
-    
-    f1, n1, a1 = is_func(t1)
-    f2, n2, a2 = is_func(t2)
-
-    if f1 and f2 and n1==n2 and len(a1)==len(a2):
-        for x1,x2 in zip(a1,a2):
-            sub = uni_terms(x1,x2,sub)
-        return sub
-    
-    return None
-
-def unify(t1, t2) -> dict:
+def apply_sub_literal(l: Literal, sub: Subst) -> Literal:
+    return Literal(l.neg, l.pred, tuple(substitute(a, sub) for a in l.args))
+
+def unify(l1: Literal, l2: Literal, idempotent: bool = False) -> Optional[Subst]:
     """
-    Unification algorithm - find most general unifier (MGU).
-    
+    Unification algorithm - find most general unifier (MGU) of two
+    complementary literals.
+
     Returns:
-        Substitution dictionary if unifiable, None otherwise
+        Substitution dictionary if unifiable, None otherwise. The MGU is
+        in triangular form unless idempotent is set.
     """
-    # TODO: Implement unification algorithm
-    n1, p1, a1 = get_literal(t1)
-    n2, p2, a2 = get_literal(t2)
-
-    if p1!=p2 or n1==n2 or len(a1)!=len(a2):
+    if l1.pred != l2.pred or l1.neg == l2.neg:
         return None
-    
-    sub = {}
-
-    for x1,x2 in zip(a1,a2):
-        sub = uni_terms(x1,x2,sub)
-        if sub is None:
-            return None
-        
+
+    sub = unify_args(l1.args, l2.args)
+    if sub is not None and idempotent:
+        sub = solved(sub)
     return sub
 
-def build_proof(clause, parents):
+def build_proof(proofs: ProofStore, cid: int) -> List[Tuple]:
+    """
+    The steps deriving clause cid, as strings. A factoring step has None
+    in place of the second clause: l1 and l2 are literals of the first
+    one, merged by the substitution.
+    """
     proof = []
-    visited = set()
-
-    def dfs(c):
-        if c in visited:
-            return
-        visited.add(c)
-
-        info = parents.get(c)
-        if info is None:
-            return
-
-        c1, c2, l1, l2, subst = info
-        dfs(c1)
-        dfs(c2)
-
+    # c1 was resolved as renamed1, with its variables shifted apart from c2's
+    for renamed1, c2, l1, l2, subst, c in proofs.steps(cid):
         proof.append((
-            list(c1),
-            list(c2),
-            l1,
-            l2,
-            subst,
-            list(c)
+            [str(l) for l in renamed1],
+            None if c2 is None else [str(l) for l in c2],
+            str(l1),
+            str(l2),
+            {str(k): str(v) for k, v in solved(subst).items()},
+            [str(l) for l in c]
         ))
-
-    dfs(clause)
     return proof
 
 
-def get_vars(t)-> List[str]:
-    if is_var(t):
-        return [t]
-    
-    f1,n1,a1 = is_func(t)
-    vars = []
-    if f1:
-        for a in a1:
-            vars.extend(get_vars(a))
-    return vars
-            
-def get_new_var(vars):
-    if not vars:
-        return "x"
-    n = vars[0]
-    while n in vars:
-        n = n + n
-    return n
-
-def rename(clauses, vars: set):
-    new_clauses = list()
-    for c in clauses:
-        new_c = list()
-        sub = {}
-        for l in c:
-            neg, pred, args = get_literal(l)
-            
-            for a in set(args):
-                vs = get_vars(a)
-                for v in vs:
-                    if v in vars and v not in sub:
-                        sub[v] = get_new_var(vars)
-                        vars.add(sub[v])
-            
-        for l in c:
-            new_c.append(apply_sub_literal(l,sub))
-
-        new_clauses.append(new_c)
-    return new_clauses
-                
-            
-
-
-def robinson_resolution(clauses: List[List[str]], max_iterations: int = 1000) -> Tuple[str, List]:
-    """
-    Robinson's resolution algorithm for FOL.
-    
-    Args:
-        clauses: List of clauses in CNF (each clause is list of literals)
-        max_iterations: Maximum resolution steps before timeout
-        
-    Returns:
-        ("UNSAT", proof) if empty clause derived (contradiction found)
-        ("TIMEOUT", []) if max_iterations reached or no new clauses
-    """
-    # TODO: Implement Robinson's resolution algorithm
-
-    # rename all vars in diff clauses:
-    vars = set()
-    clauses = rename(clauses,vars)
-    clause_set = set()
-    parents = {}
-    new = set()
-
-    for c in clauses:
-        fc = frozenset(c)
-        clause_set.add(fc)
-        parents[fc] = None
-
-    for _ in range(max_iterations):
-        clause_list = list(clause_set)
-
-        for i in range(len(clause_list)):
-            for j in range(i + 1, len(clause_list)):
-                c11, c22 = clause_list[i], clause_list[j]
-                
-                c = rename([c11,c22],vars)
-                c1, c2 = c[0] , c[1]
-
-                for l1 in c1:
-                    for l2 in c2:
-                        sub = unify(l1, l2)
-                        if sub is None:
-                            continue
-
-                        # complementary check is implicit in unify
-                        resolvent = set()
-
-                        for x in c1:
-                            if x != l1:
-                                resolvent.add(apply_sub_literal(x, sub))
+def _unsat(proofs: ProofStore, cid: int, proof_out: Optional[TextIO]) -> Tuple[str, List]:
+    if proof_out is None:
+        return "UNSAT", build_proof(proofs, cid)
+    proofs.write_tstp(cid, proof_out)
+    return "UNSAT", []
 
-                        for x in c2:
-                            if x != l2:
-                                resolvent.add(apply_sub_literal(x, sub))
 
-                        # empty clause => contradiction
-                        if not resolvent:
-                            empty = frozenset()
-                            parents[empty] = (c11, c22, l1, l2, sub)
-                            # print ( build_proof(empty,parents))
-                            return "UNSAT", build_proof(empty,parents)
+def resolve(c1: FrozenSet[Literal], c2: FrozenSet[Literal], l1: Literal, l2: Literal,
+            sub: Subst) -> FrozenSet[Literal]:
+    """The resolvent of c1 and c2 on l1 and l2, with mgu sub."""
+    resolvent = set()
 
-                        new_clause = frozenset(resolvent)
+    for x in c1:
+        if x is not l1:
+            resolvent.add(apply_sub_literal(x, sub))
 
-                        r2 = resolvent.copy()
+    for x in c2:
+        if x is not l2:
+            resolvent.add(apply_sub_literal(x, sub))
 
-                        if new_clause and new_clause not in clause_set:
-                            new.add(new_clause)
-                            parents[new_clause] = (c11,c22,l1,l2,sub)
+    return frozenset(resolvent)
 
 
-        if not new:
-            return "TIMEOUT", []
-        
-        clause_set |= new
-        new.clear()
+def factors(clause: FrozenSet[Literal]):
+    """
+    Yields (l1, l2, mgu, factor) for every binary factor of clause: two
+    literals of the same sign and predicate unified, factor in canonical form.
+    """
+    lits = sorted(clause, key=str)
+    for i, l1 in enumerate(lits):
+        for l2 in lits[i + 1:]:
+            if l1.neg != l2.neg:
+                continue
+            sub = unify(l1, l2.negated())
+            if sub is not None:
+                yield l1, l2, sub, canonical(apply_sub_literal(l, sub) for l in clause)
+
+
+def resolutions(given: FrozenSet[Literal], partners: LiteralIndex,
+                order: Optional[Dict[FrozenSet[Literal], int]] = None):
+    """
+    Yields (l1, l2, partner, mgu, resolvent) for every resolution step
+    between given and the clauses in partners, resolvent in canonical form.
+    given must be standardized apart from them. With order (partner ->
+    activation number) the steps come in the order ResolverPool.resolve()
+    merges them in.
+    """
+    # partners may change while the steps are consumed, so collect the pairs first
+    candidates = [(l1, l2, partner) for l1 in given
+                  for l2, partner in partners.unifiable(l1.negated())]
+    if order is not None:
+        candidates.sort(key=lambda c: (order[c[2]], str(c[0]), str(c[1])))
+    for l1, l2, partner in candidates:
+        sub = unify(l1, l2)
+        if sub is not None:
+            yield l1, l2, partner, sub, canonical(resolve(given, partner, l1, l2, sub))
+
+
+def robinson_resolution(clauses: List[List[str]], max_iterations: int = 1000,
+                        pick_ratio: int = 5,
+                        sos: Optional[Iterable[int]] = None,
+                        workers: int = 0,
+                        proof_out: Optional[TextIO] = None) -> Tuple[str, List]:
+    """
+    Robinson's resolution algorithm for FOL, run as a given-clause loop:
+    all clauses start out passive; each iteration selects one passive
+    clause (see passive.PassiveQueue), moves it to the active set and
+    resolves it against the active clauses only, itself included, so no
+    pair of clauses is ever resolved twice. Every clause is stored with
+    canonically numbered variables (see canonical.py), so variants are
+    dropped as duplicates. The literals of the active clauses sit in a
+    discrimination tree (see index.LiteralIndex), so each literal of the
+    given clause is only unified with the active literals it may clash with.
+
+    With sos (set of support), only the clauses at those indices -
+    typically the negated goal - start out passive; the others go straight
+    to the active set. Every given clause is then a supported clause or a
+    descendant of one, so axioms are never resolved against each other.
+
+    With workers > 1 the resolution steps of each given clause are
+    computed by that many processes (see parallel.ResolverPool) and merged
+    in a fixed order, the one used without workers too, so the outcome
+    does not depend on the number of workers.
+
+    Every input clause and every kept resolvent is also factored: two of
+    its literals with the same sign and predicate are unified and merged,
+    and the factor is kept like a resolvent. Without factoring, clauses
+    such as P(x) | P(y) and ~P(u) | ~P(v) never resolve to the empty
+    clause.
+
+    Resolvents and factors subsumed by a kept clause are dropped, and kept
+    clauses (passive or active) subsumed by a new one are removed. Clauses
+    already derived or dropped are recognized by their canonical form and
+    never tested for subsumption again.
+
+    Derivations are kept as integer records (see proof.ProofStore) and
+    the proof is only rebuilt once the empty clause is found.
 
-    return "TIMEOUT", []
+    Args:
+        clauses: List of clauses in CNF (each clause is list of literals)
+        max_iterations: Maximum number of given clauses before timeout.
+            One iteration selects and resolves a single given clause,
+            not a whole saturation round over all pairs as in the
+            original loop, so the same limit allows less search
+        pick_ratio: given clauses picked by weight per one picked by age
+        sos: indices into clauses of the supported clauses (None: all)
+        workers: number of worker processes; 0 or 1 runs in this process
+        proof_out: if given, the proof is written there in TSTP
+            format instead of being returned
 
+    Returns:
+        ("UNSAT", proof) if empty clause derived (contradiction found);
+            proof is empty when written to proof_out
+        ("TIMEOUT", []) if max_iterations reached or no new clauses
+    """
+    clauses = [canonical(parse_literal(l) for l in c) for c in clauses]
+    proofs = ProofStore()   # every clause derived so far, kept or subsumed
+    # clauses dropped as subsumed when derived; they stay redundant, since
+    # whatever removes their subsumer later subsumes them too
+    dropped = set()
+    kept = SubsumptionIndex()
+    passive = PassiveQueue(pick_ratio)
+    active = {}         # clause -> activation number
+    activations = itertools.count()
+    # literals of the active clauses, spread over the workers if there are any
+    pool = ResolverPool(workers) if workers > 1 else None
+    partners = pool or LiteralIndex()
+    offset = 0          # more than the largest variable index in active
+
+    def activate(clause):
+        nonlocal offset
+        active[clause] = next(activations)
+        partners.add(clause)
+        offset = max(offset, width(clause))
+
+    def redundant(clause):
+        """True if a new clause is a duplicate or subsumed by a kept clause."""
+        if clause in proofs or clause in dropped:
+            return True
+        if kept.subsuming(clause) is not None:
+            dropped.add(clause)
+            return True
+        return False
+
+    def keep(clause):
+        """Adds a new derived clause and removes the kept clauses it subsumes."""
+        for old in kept.subsumed(clause):
+            kept.remove(old)
+            passive.discard(old)
+            if old in active:
+                del active[old]
+                partners.remove(old)
+        kept.add(clause)
+        passive.push(clause)
+
+    def keep_factors(clause):
+        """Keeps the factors of a kept clause, their factors and so on."""
+        todo = [clause]
+        while todo:
+            parent = todo.pop()
+            for l1, l2, _, factor in factors(parent):
+                if redundant(factor):
+                    continue
+                proofs.add_factor(factor, parent, l1, l2)
+                keep(factor)
+                todo.append(factor)
+
+    try:
+        if sos is None:
+            sos = range(len(clauses))
+        supported = set()
+        for i in sos:
+            if not 0 <= i < len(clauses):
+                raise ValueError(f"sos index out of range: {i}")
+            supported.add(clauses[i])
+
+        inputs = []
+        for fc in clauses:
+            if fc in proofs:
+                continue
+            cid = proofs.add_input(fc)
+            if not fc:
+                return _unsat(proofs, cid, proof_out)
+            inputs.append(fc)
+        # factors of an input clause start out where the clause does, so
+        # with sos the axioms and their factors are still never given
+        todo = [(fc, fc in supported) for fc in reversed(inputs)]
+        while todo:
+            fc, is_supported = todo.pop()
+            kept.add(fc)
+            if is_supported:
+                passive.push(fc)
+            else:
+                activate(fc)
+            for l1, l2, _, factor in factors(fc):
+                if factor not in proofs:
+                    proofs.add_factor(factor, fc, l1, l2)
+                    todo.append((factor, is_supported))
+
+        for _ in range(max_iterations):
+            given = passive.pop()
+            if given is None:
+                return "TIMEOUT", []
+
+            # given is active while it is resolved, so it meets a copy of itself too
+            activate(given)
+            # shift the given clause's variables past those of every partner
+            renamed, renaming = shift(given, offset)
+            original = {r: l for l, r in renaming.items()}
+            if pool is None:
+                steps = resolutions(renamed, partners, active)
+            else:
+                steps = pool.resolve(renamed)
+            for l1, l2, partner, _, resolvent in steps:
+                if partner not in active:
+                    continue    # subsumed by an earlier resolvent of given
+                # empty clause => contradiction
+                if not resolvent:
+                    cid = proofs.add(resolvent, given, original[l1], partner, l2, offset)
+                    return _unsat(proofs, cid, proof_out)
+
+                if redundant(resolvent):
+                    continue
+                proofs.add(resolvent, given, original[l1], partner, l2, offset)
+                keep(resolvent)
+                keep_factors(resolvent)
+
+                if given not in kept:
+                    break
+
+        return "TIMEOUT", []
+    finally:
+        if pool is not None:
+            pool.close()
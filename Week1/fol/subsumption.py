@@ -0,0 +1,275 @@
+"""
+Theta-subsumption between clauses, and an index of kept clauses.
+
+C subsumes D if some substitution s maps every literal of C onto a literal
+of D (Cs is a subset of D) and C has no more literals than D; s is found
+by one-way matching (unify.match_args). A subsumed clause adds nothing to
+the search, so new clauses subsumed by a kept one are dropped (forward
+subsumption) and kept clauses subsumed by a new one are removed
+(backward subsumption).
+
+The index keeps features per clause: for every (sign, predicate) key
+the largest term depth and symbol count among its literals. Instantiation
+only makes literals deeper and bigger, so C can subsume D only if each of
+C's keys occurs in D with features no larger there, and C has no more
+literals than D.
+
+Clauses are grouped by their set of keys. Within a group every clause
+has a vector of the same length: its literal count, then the features of
+each key in sorted order. The vectors sit in a trie (_FeatureTrie), and
+a query only descends into children whose value can still satisfy the
+bound, so clauses with incompatible features are never enumerated.
+Forward queries look at the groups for subsets of the new clause's keys
+(or scan the groups when there are fewer of them than subsets); backward
+queries look at the groups holding every key of the new clause.
+"""
+
+import itertools
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from .terms import Fn, Literal, Term, Var
+from .unify import match_args
+
+Clause = FrozenSet[Literal]
+Key = Tuple[bool, str]
+Features = Dict[Key, Tuple[int, int]]
+
+
+def match_literal(pattern: Literal, target: Literal, sub: Dict[Var, Term]) -> Optional[Dict[Var, Term]]:
+    """sub extended to map pattern onto target, or None. sub is not changed."""
+    if pattern.neg != target.neg or pattern.pred != target.pred:
+        return None
+    return match_args(pattern.args, target.args, sub)
+
+
+def _variables(l: Literal) -> Set[Var]:
+    out = set()
+    todo = list(l.args)
+    while todo:
+        t = todo.pop()
+        if isinstance(t, Fn):
+            todo.extend(t.args)
+        else:
+            out.add(t)
+    return out
+
+
+def _components(lits: List[Literal], variables: Dict[Literal, Set[Var]]) -> List[List[Literal]]:
+    """Splits lits into groups that share no variables."""
+    owner = {}      # variable -> index of the group holding it
+    groups = []
+    for l in lits:
+        merged = [l]
+        for g in {owner[v] for v in variables[l] if v in owner}:
+            merged.extend(groups[g])
+            groups[g] = []
+        groups.append(merged)
+        for x in merged:
+            for v in variables[x]:
+                owner[v] = len(groups) - 1
+    return [g for g in groups if g]
+
+
+def subsumes(c: Clause, d: Clause) -> bool:
+    """True if clause c theta-subsumes clause d."""
+    if len(c) > len(d):
+        return False
+    by_key = {}
+    for l in d:
+        by_key.setdefault((l.neg, l.pred), []).append(l)
+    candidates = {}
+    for l in c:
+        candidates[l] = [t for t in by_key.get((l.neg, l.pred), ()) if match_literal(l, t, {}) is not None]
+        if not candidates[l]:
+            return False
+
+    # literals sharing no variables are matched independently, so a failure
+    # in one group never makes the search retry the choices made in another
+    variables = {l: _variables(l) for l in c}
+    for group in _components(list(c), variables):
+        # depth-first search with forward checking: targets[l] holds the
+        # targets of l consistent with the bindings so far, and each step
+        # matches the literal with the fewest of them
+        stack = [(group, {}, {l: candidates[l] for l in group})]
+        while stack:
+            remaining, sub, targets = stack.pop()
+            if not remaining:
+                break
+            l = min(remaining, key=lambda x: len(targets[x]))
+            rest = [x for x in remaining if x is not l]
+            for target in targets[l]:
+                extended = match_literal(l, target, sub)
+                if extended is None:
+                    continue
+                bound = variables[l] - sub.keys()
+                narrowed = {}
+                for x in rest:
+                    if variables[x] & bound:
+                        narrowed[x] = [t for t in targets[x] if match_literal(x, t, extended) is not None]
+                        if not narrowed[x]:
+                            break
+                    else:
+                        narrowed[x] = targets[x]
+                else:
+                    stack.append((rest, extended, narrowed))
+        else:
+            return False
+    return True
+
+
+def features(clause: Clause) -> Features:
+    """(sign, predicate) -> (largest term depth, largest symbol count)."""
+    fv = {}
+    for l in clause:
+        depth = size = 0
+        todo = [(a, 1) for a in l.args]
+        while todo:
+            t, d = todo.pop()
+            size += 1
+            depth = max(depth, d)
+            if isinstance(t, Fn):
+                todo.extend((a, d + 1) for a in t.args)
+        key = (l.neg, l.pred)
+        old = fv.get(key, (0, 0))
+        fv[key] = (max(old[0], depth), max(old[1], size))
+    return fv
+
+
+def _vector(clause: Clause, fv: Features, keys: Tuple[Key, ...]) -> Tuple[int, ...]:
+    """The literal count of clause, then the features of keys in order."""
+    return (len(clause),) + tuple(x for key in keys for x in fv[key])
+
+
+class _FeatureTrie:
+    """Clauses by integer vectors of one length, in a trie with a level per component."""
+
+    def __init__(self):
+        self.root = {}      # value -> child node; the last level maps to sets of clauses
+        self.size = 0
+
+    def add(self, vector: Tuple[int, ...], clause: Clause) -> None:
+        node = self.root
+        for x in vector[:-1]:
+            node = node.setdefault(x, {})
+        node.setdefault(vector[-1], set()).add(clause)
+        self.size += 1
+
+    def remove(self, vector: Tuple[int, ...], clause: Clause) -> None:
+        path = [self.root]
+        for x in vector[:-1]:
+            path.append(path[-1][x])
+        leaf = path[-1][vector[-1]]
+        leaf.discard(clause)
+        self.size -= 1
+        # prune the nodes left empty, deepest first
+        if not leaf:
+            for node, x in zip(reversed(path), reversed(vector)):
+                del node[x]
+                if node:
+                    break
+
+    def at_most(self, bound: Tuple[int, ...]) -> Iterator[Clause]:
+        """The clauses whose vector is componentwise at most bound."""
+        return self._search(lambda i, x: x <= bound[i], len(bound))
+
+    def at_least(self, bound: Tuple[Optional[int], ...]) -> Iterator[Clause]:
+        """The clauses whose vector is at least bound wherever bound is not None."""
+        return self._search(lambda i, x: bound[i] is None or x >= bound[i], len(bound))
+
+    def _search(self, accept, n: int) -> Iterator[Clause]:
+        stack = [(self.root, 0)]
+        while stack:
+            node, i = stack.pop()
+            for x, child in node.items():
+                if not accept(i, x):
+                    continue
+                if i == n - 1:
+                    yield from child
+                else:
+                    stack.append((child, i + 1))
+
+
+class SubsumptionIndex:
+    def __init__(self):
+        self.features = {}      # clause -> its feature vector
+        # frozenset of (sign, predicate) -> trie of the clauses with exactly those keys
+        self.groups = {}
+        self.order = {}         # frozenset of keys -> the keys in the order of the trie's levels
+        self.buckets = {}       # (sign, predicate) -> the key sets of the groups holding it
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def __contains__(self, clause: Clause) -> bool:
+        return clause in self.features
+
+    def add(self, clause: Clause) -> None:
+        if clause in self.features:
+            return
+        fv = features(clause)
+        self.features[clause] = fv
+        keys = frozenset(fv)
+        if keys not in self.groups:
+            self.groups[keys] = _FeatureTrie()
+            self.order[keys] = tuple(sorted(keys))
+            for key in keys:
+                self.buckets.setdefault(key, set()).add(keys)
+        self.groups[keys].add(_vector(clause, fv, self.order[keys]), clause)
+
+    def remove(self, clause: Clause) -> None:
+        fv = self.features.pop(clause, None)
+        if fv is None:
+            return
+        keys = frozenset(fv)
+        group = self.groups[keys]
+        group.remove(_vector(clause, fv, self.order[keys]), clause)
+        if not group.size:
+            del self.groups[keys]
+            del self.order[keys]
+            for key in keys:
+                bucket = self.buckets[key]
+                bucket.discard(keys)
+                if not bucket:
+                    del self.buckets[key]
+
+    def subsuming(self, clause: Clause) -> Optional[Clause]:
+        """A kept clause that subsumes clause, or None (forward subsumption)."""
+        fv = features(clause)
+        for keys in self._subgroups(frozenset(fv)):
+            for c in self.groups[keys].at_most(_vector(clause, fv, self.order[keys])):
+                if subsumes(c, clause):
+                    return c
+        return None
+
+    def _subgroups(self, keys: FrozenSet[Key]) -> Iterator[FrozenSet[Key]]:
+        """The key sets of the groups whose keys are a non-empty subset of keys."""
+        if 2 ** len(keys) <= len(self.groups):
+            for r in range(1, len(keys) + 1):
+                for subset in itertools.combinations(keys, r):
+                    subset = frozenset(subset)
+                    if subset in self.groups:
+                        yield subset
+        else:
+            for group_keys in list(self.groups):
+                if group_keys <= keys:
+                    yield group_keys
+
+    def subsumed(self, clause: Clause) -> List[Clause]:
+        """The kept clauses that clause subsumes (backward subsumption)."""
+        fv = features(clause)
+        if not fv:
+            return list(self.features)
+        buckets = []
+        for key in fv:
+            bucket = self.buckets.get(key)
+            if not bucket:
+                return []
+            buckets.append(bucket)
+        # a subsumed clause carries every key of clause
+        buckets.sort(key=len)
+        out = []
+        for keys in buckets[0].intersection(*buckets[1:]):
+            bound = (len(clause),) + tuple(x for key in self.order[keys]
+                                           for x in fv.get(key, (None, None)))
+            out.extend(d for d in self.groups[keys].at_least(bound) if subsumes(clause, d))
+        return out
@@ -0,0 +1,165 @@
+"""
+Terms and literals for the resolution prover.
+
+Input strings are parsed once into interned nodes: constructing a node
+equal to a live one returns that node, so equal terms are one object and
+are compared and hashed by identity. Substitution, unification and the
+clause sets work on these nodes; strings are only produced for output.
+Function applications and literals also record whether they are ground,
+so two ground terms are compared by identity instead of being walked.
+
+Names follow the input convention: a name starting with a lowercase
+letter is a variable unless it is applied to arguments, f(...) is a
+function application and any other name is a constant (a Fn without
+arguments).
+"""
+
+import re
+import weakref
+from typing import List
+
+_nodes = weakref.WeakValueDictionary()   # (class, *fields) -> the one node
+
+
+class _Interned:
+    __slots__ = ("__weakref__",)
+    _fields = ()
+
+    def __new__(cls, *args):
+        key = (cls,) + args
+        node = _nodes.get(key)
+        if node is None:
+            if len(args) != len(cls._fields):
+                raise TypeError(f"{cls.__name__} takes {len(cls._fields)} arguments")
+            node = object.__new__(cls)
+            for field, arg in zip(cls._fields, args):
+                setattr(node, field, arg)
+            node._derive()
+            _nodes[key] = node
+        return node
+
+    def _derive(self) -> None:
+        """Sets the attributes computed from the fields."""
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, f) for f in self._fields)
+
+    def __str__(self):
+        out = []
+        _render(self, out)
+        return "".join(out)
+
+    __repr__ = __str__
+
+
+class Term(_Interned):
+    __slots__ = ()
+
+
+class Var(Term):
+    __slots__ = ("name",)
+    _fields = ("name",)
+
+
+class Fn(Term):
+    """Function application; constants are Fns without arguments."""
+    __slots__ = ("name", "args", "ground")
+    _fields = ("name", "args")
+
+    def _derive(self) -> None:
+        self.ground = all(isinstance(a, Fn) and a.ground for a in self.args)
+
+
+class Literal(_Interned):
+    __slots__ = ("neg", "pred", "args", "ground", "_text")
+    _fields = ("neg", "pred", "args")
+
+    def _derive(self) -> None:
+        self.ground = all(isinstance(a, Fn) and a.ground for a in self.args)
+        self._text = None
+
+    def __str__(self):
+        # literals are used as sort keys, so the string is kept
+        if self._text is None:
+            self._text = super().__str__()
+        return self._text
+
+    __repr__ = __str__
+
+    def negated(self) -> "Literal":
+        return Literal(not self.neg, self.pred, self.args)
+
+
+def _render(node, out: List[str]) -> None:
+    """Appends the string form of node to out, without recursion."""
+    stack = [node]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, str):
+            out.append(x)
+            continue
+        if isinstance(x, Literal):
+            if x.neg:
+                out.append("~")
+            name = x.pred
+        else:
+            name = x.name
+        out.append(name)
+        if isinstance(x, Var) or not x.args:
+            continue
+        out.append("(")
+        stack.append(")")
+        for i in range(len(x.args) - 1, -1, -1):
+            stack.append(x.args[i])
+            if i:
+                stack.append(",")
+
+
+_TOKENS = re.compile(r"[(),]|[^\s(),]+")
+
+
+def _atom(name: str) -> Term:
+    return Var(name) if name[0].islower() else Fn(name, ())
+
+
+def parse_term(text: str) -> Term:
+    frames = []     # [name, args] of the applications being read
+    term = None     # last complete term, not yet placed in an argument list
+    name = None     # name read but not yet known to be applied
+    for tok in _TOKENS.findall(text):
+        if tok == "(":
+            if name is None:
+                raise ValueError(f"malformed term: {text!r}")
+            frames.append((name, []))
+            name = None
+            continue
+        if name is not None:
+            term = _atom(name)
+            name = None
+        if tok in ",)":
+            if term is None or not frames:
+                raise ValueError(f"malformed term: {text!r}")
+            frames[-1][1].append(term)
+            term = None
+            if tok == ")":
+                fname, args = frames.pop()
+                term = Fn(fname, tuple(args))
+        elif term is not None:
+            raise ValueError(f"malformed term: {text!r}")
+        else:
+            name = tok
+    if name is not None:
+        term = _atom(name)
+    if term is None or frames:
+        raise ValueError(f"malformed term: {text!r}")
+    return term
+
+
+def parse_literal(text: str) -> Literal:
+    """Parses "P(x,f(a))" or "~P(x,f(a))"."""
+    text = text.strip()
+    neg = text.startswith("~")
+    atom = parse_term(text[1:] if neg else text)
+    if isinstance(atom, Var):
+        return Literal(neg, atom.name, ())
+    return Literal(neg, atom.name, atom.args)
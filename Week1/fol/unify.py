@@ -0,0 +1,125 @@
+"""
+Unification and matching over interned terms.
+
+Bindings are triangular: a variable is bound to a term that may itself
+contain bound variables, and nothing is rewritten when a new binding is
+added. Terms are dereferenced lazily with walk(), so a unification costs
+time proportional to the terms it visits rather than to the number of
+bindings times their size. The occurs check follows bindings through the
+whole term, so x = f(g(x)) fails as it should.
+
+solved() turns triangular bindings into the usual idempotent MGU, in which
+no bound variable occurs in any bound term; substitute() applies either
+form to a term.
+"""
+
+from typing import Dict, Optional, Sequence
+
+from .terms import Fn, Term, Var
+
+Bindings = Dict[Var, Term]
+
+
+def walk(t: Term, bindings: Bindings) -> Term:
+    """Follows variable bindings until an unbound variable or a Fn."""
+    while isinstance(t, Var):
+        bound = bindings.get(t)
+        if bound is None:
+            return t
+        t = bound
+    return t
+
+
+def occurs(v: Var, t: Term, bindings: Bindings) -> bool:
+    """True if v occurs in t once bindings are applied."""
+    todo = [t]
+    while todo:
+        t = walk(todo.pop(), bindings)
+        if t is v:
+            return True
+        if isinstance(t, Fn) and not t.ground:
+            todo.extend(t.args)
+    return False
+
+
+def unify_args(args1: Sequence[Term], args2: Sequence[Term],
+               bindings: Optional[Bindings] = None) -> Optional[Bindings]:
+    """
+    Most general unifier of two argument lists, in triangular form.
+
+    Extends a copy of bindings if given. Returns None if the lists do not
+    unify.
+    """
+    if len(args1) != len(args2):
+        return None
+    bindings = {} if bindings is None else dict(bindings)
+    todo = list(zip(args1, args2))
+    while todo:
+        t1, t2 = todo.pop()
+        t1 = walk(t1, bindings)
+        t2 = walk(t2, bindings)
+        if t1 is t2:
+            continue
+        if isinstance(t1, Var):
+            if occurs(t1, t2, bindings):
+                return None
+            bindings[t1] = t2
+        elif isinstance(t2, Var):
+            if occurs(t2, t1, bindings):
+                return None
+            bindings[t2] = t1
+        elif t1.name == t2.name and len(t1.args) == len(t2.args):
+            todo.extend(zip(t1.args, t2.args))
+        else:
+            return None
+    return bindings
+
+
+def unify(t1: Term, t2: Term, bindings: Optional[Bindings] = None) -> Optional[Bindings]:
+    return unify_args((t1,), (t2,), bindings)
+
+
+def match_args(patterns: Sequence[Term], targets: Sequence[Term],
+               bindings: Optional[Bindings] = None) -> Optional[Bindings]:
+    """
+    One-way matching: bindings for the pattern variables only, such that
+    the patterns become the targets. Target variables are treated as
+    constants, so no occurs check is needed. Extends a copy of bindings.
+    """
+    if len(patterns) != len(targets):
+        return None
+    bindings = {} if bindings is None else dict(bindings)
+    todo = list(zip(patterns, targets))
+    while todo:
+        p, t = todo.pop()
+        if isinstance(p, Var):
+            bound = bindings.get(p)
+            if bound is None:
+                bindings[p] = t
+            elif bound is not t:
+                return None
+        elif p is t:
+            continue
+        elif p.ground or not isinstance(t, Fn) or p.name != t.name or len(p.args) != len(t.args):
+            # a ground pattern only matches itself
+            return None
+        else:
+            todo.extend(zip(p.args, t.args))
+    return bindings
+
+
+def match(pattern: Term, target: Term, bindings: Optional[Bindings] = None) -> Optional[Bindings]:
+    return match_args((pattern,), (target,), bindings)
+
+
+def substitute(t: Term, bindings: Bindings) -> Term:
+    """t with bindings applied all the way down."""
+    t = walk(t, bindings)
+    if isinstance(t, Var) or t.ground:
+        return t
+    return Fn(t.name, tuple(substitute(a, bindings) for a in t.args))
+
+
+def solved(bindings: Bindings) -> Bindings:
+    """The idempotent MGU equivalent to triangular bindings."""
+    return {v: substitute(t, bindings) for v, t in bindings.items()}
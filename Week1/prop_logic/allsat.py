@@ -0,0 +1,86 @@
+"""
+Model enumeration (All-SAT) on the CDCL engine.
+
+iter_models is a generator: each model is yielded as soon as it is
+found, and a blocking clause excluding it is added before the search
+continues from where it stopped (CDCLSolver.block), so neither the
+learned clauses nor the trail are thrown away between models.
+
+Without a projection the blocking clause is shrunk first: a literal is
+dropped from the model whenever every clause it satisfies is also
+satisfied by another kept literal. The yielded model is then partial and
+stands for all of its completions, and each blocking clause cuts away a
+whole cube of models at once. Models stay disjoint because previous
+blocking clauses are among the clauses that must remain satisfied.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from cdcl import CDCLSolver
+from clause_db import ClauseDB
+
+
+def _shrink(cube: List[int], clauses: List[List[int]], occ: Dict[int, List[int]]) -> List[int]:
+    """Drops literals of cube that no clause needs."""
+    in_cube = set(cube)
+    sat_count = [sum(1 for l in c if l in in_cube) for c in clauses]
+    kept = []
+    for lit in cube:
+        cis = occ.get(lit, ())
+        if all(sat_count[ci] > 1 for ci in cis):
+            for ci in cis:
+                sat_count[ci] -= 1
+        else:
+            kept.append(lit)
+    return kept
+
+
+def iter_models(clauses, project: Optional[Iterable[str]] = None,
+                limit: Optional[int] = None, minimize: bool = True,
+                heuristic: str = "vsids") -> Iterator[Dict[str, bool]]:
+    """
+    clauses: list of sets of literals, or a ClauseDB (not modified)
+    project: only enumerate distinct assignments of these variables
+    limit: stop after this many models
+    minimize: yield partial models covering many total ones (no projection)
+    Yields: dicts mapping variable -> bool
+    """
+    # blocking and learned clauses go into the solver's store, so never the caller's
+    clauses = ClauseDB.from_any(clauses)
+    solver = CDCLSolver(clauses, heuristic=heuristic)
+    db = solver.db
+    if project is not None:
+        keep = [solver.lit(v) >> 1 for v in project]
+        minimize = False
+    else:
+        keep = range(1, db.num_vars + 1)
+
+    # the clauses a shrunk model must keep satisfied: the input and all
+    # blocking clauses so far (learned clauses follow from these)
+    needed, occ = [], {}
+
+    def remember(c):
+        for l in c:
+            occ.setdefault(l, []).append(len(needed))
+        needed.append(c)
+
+    if minimize:
+        for c in db:
+            remember(list(c))
+
+    count = 0
+    resume = False
+    while limit is None or count < limit:
+        if not solver.solve(resume=resume):
+            return
+        cube = [2 * v | (solver.val[2 * v] is False) for v in keep]
+        if minimize:
+            cube = _shrink(cube, needed, occ)
+        yield {db.names[l >> 1]: not l & 1 for l in cube}
+        count += 1
+
+        blocking = [l ^ 1 for l in cube]
+        if minimize:
+            remember(blocking)
+        solver.block(blocking)
+        resume = True
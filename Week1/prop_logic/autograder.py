@@ -1,12 +1,18 @@
 """
 Autograder for Propositional Logic Assignment
-Tests both to_cnf.py and dpll.py implementations
+Tests to_cnf.py and dpll.py, and the solver.py, allsat.py and dimacs.py
+interfaces
 """
 
+import bz2
+import gzip
+import io
 import json
+import lzma
 import os
 import sys
-from typing import List, Set, Dict, Tuple, Any
+import tempfile
+from typing import List, Set, Dict, Tuple, Any, Optional
 import traceback
 
 # Add parent directory to path for imports
@@ -15,19 +21,47 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Import the modules to test
 try:
     from to_cnf import Expr, Var, Not, And, Or, Implies, to_cnf
+    from expr_parser import ParseError, parse as parse_expression
     CNF_IMPORT_SUCCESS = True
 except Exception as e:
     print(f"Error importing to_cnf.py: {e}")
     CNF_IMPORT_SUCCESS = False
-    Expr = Var = Not = And = Or = Implies = to_cnf = None
+    Expr = Var = Not = And = Or = Implies = to_cnf = parse_expression = ParseError = None
 
 try:
     from dpll import dpll
+    from cube import cube_and_conquer
+    from stats import UNKNOWN, Budget
     DPLL_IMPORT_SUCCESS = True
 except Exception as e:
     print(f"Error importing dpll.py: {e}")
     DPLL_IMPORT_SUCCESS = False
-    dpll = None
+    dpll = cube_and_conquer = UNKNOWN = Budget = None
+
+try:
+    from solver import Solver
+    SOLVER_IMPORT_SUCCESS = True
+except Exception as e:
+    print(f"Error importing solver.py: {e}")
+    SOLVER_IMPORT_SUCCESS = False
+    Solver = None
+
+try:
+    from allsat import iter_models
+    from clause_db import ClauseDB
+    ALLSAT_IMPORT_SUCCESS = True
+except Exception as e:
+    print(f"Error importing allsat.py: {e}")
+    ALLSAT_IMPORT_SUCCESS = False
+    iter_models = ClauseDB = None
+
+try:
+    from dimacs import read_dimacs, write_dimacs
+    DIMACS_IMPORT_SUCCESS = True
+except Exception as e:
+    print(f"Error importing dimacs.py: {e}")
+    DIMACS_IMPORT_SUCCESS = False
+    read_dimacs = write_dimacs = None
 
 
 class Colors:
@@ -41,63 +75,6 @@ class Colors:
     END = '\033[0m'
 
 
-def strip_outer_parentheses(expr: str) -> str:
-    if not (expr.startswith("(") and expr.endswith(")")):
-        return expr
-
-    depth = 0
-    for i, ch in enumerate(expr):
-        if ch == "(":
-            depth += 1
-        elif ch == ")":
-            depth -= 1
-        if depth == 0 and i != len(expr) - 1:
-            return expr
-    return expr[1:-1].strip()
-
-
-def parse_expression(expr_str: str) -> Expr:
-    expr_str = strip_outer_parentheses(expr_str.strip())
-
-    depth = 0
-    for i in range(len(expr_str)):
-        if expr_str[i] == '(':
-            depth += 1
-        elif expr_str[i] == ')':
-            depth -= 1
-        elif depth == 0 and expr_str[i:i+2] == '->':
-            left = parse_expression(expr_str[:i].strip())
-            right = parse_expression(expr_str[i+2:].strip())
-            return Implies(left, right)
-
-    depth = 0
-    for i in range(len(expr_str) - 1, -1, -1):
-        if expr_str[i] == ')':
-            depth += 1
-        elif expr_str[i] == '(':
-            depth -= 1
-        elif depth == 0 and expr_str[i] == '|':
-            left = parse_expression(expr_str[:i].strip())
-            right = parse_expression(expr_str[i+1:].strip())
-            return Or(left, right)
-
-    depth = 0
-    for i in range(len(expr_str) - 1, -1, -1):
-        if expr_str[i] == ')':
-            depth += 1
-        elif expr_str[i] == '(':
-            depth -= 1
-        elif depth == 0 and expr_str[i] == '&':
-            left = parse_expression(expr_str[:i].strip())
-            right = parse_expression(expr_str[i+1:].strip())
-            return And(left, right)
-
-    if expr_str.startswith('~'):
-        return Not(parse_expression(expr_str[1:].strip()))
-
-    return Var(expr_str)
-
-
 def normalize_cnf(cnf: Any):
     if isinstance(cnf, list):
         result = []
@@ -150,15 +127,42 @@ def test_to_cnf(test_cases: List[Dict]) -> Tuple[int, List[Dict]]:
             'error': None
         }
         try:
-            expr = parse_expression(test_case['input'])
-            cnf_output = to_cnf(expr)
-            expected = normalize_cnf(test_case['expected'])
-            actual = normalize_cnf(cnf_output)
-            if expected == actual:
+            if 'expected_error' in test_case:
+                try:
+                    parse_expression(test_case['input'])
+                    result['error'] = "Expected a ParseError"
+                except ParseError as e:
+                    if test_case['expected_error'] not in str(e):
+                        result['error'] = f"Expected an error {test_case['expected_error']}, Got: {e}"
+            elif 'mode' in test_case:
+                # definitional CNF: equisatisfiable, and its models are
+                # models of the formula on the original variables
+                expr = parse_expression(test_case['input'])
+                sat, assignment = dpll(to_cnf(expr, test_case['mode']))
+                if sat != test_case['expected_sat']:
+                    result['error'] = f"Expected SAT={test_case['expected_sat']}, Got SAT={sat}"
+                elif sat and not verify_dpll_assignment(to_cnf(expr), assignment):
+                    result['error'] = f"Assignment {assignment} does not satisfy the formula"
+            else:
+                expr = parse_expression(test_case['input'])
+                # a chain of conjunctions sharing one node, 2^doubled copies as a tree
+                for _ in range(test_case.get('doubled', 0)):
+                    expr = And(expr, expr)
+                # deep formulas built here rather than spelled out in the JSON:
+                # premises[0] -> (premises[1] -> (... -> expr)), nested levels deep
+                premises = test_case.get('premises', [])
+                for i in range(test_case.get('nested', 0)):
+                    expr = Implies(Var(premises[i % len(premises)]), expr)
+                for _ in range(test_case.get('negated', 0)):
+                    expr = Not(expr)
+                cnf_output = to_cnf(expr)
+                expected = normalize_cnf(test_case['expected'])
+                actual = normalize_cnf(cnf_output)
+                if expected != actual:
+                    result['error'] = f"Expected: {expected}, Got: {actual}"
+            if result['error'] is None:
                 result['passed'] = True
                 passed += 1
-            else:
-                result['error'] = f"Expected: {expected}, Got: {actual}"
         except NotImplementedError:
             result['error'] = "NotImplementedError - Function not implemented"
         except Exception as e:
@@ -181,15 +185,19 @@ def test_dpll(test_cases: List[Dict]) -> Tuple[int, List[Dict]]:
         }
         try:
             clauses = [set(clause) for clause in test_case['clauses']]
-            sat, assignment = dpll(clauses)
-            if sat != test_case['expected_sat']:
-                result['error'] = f"Expected SAT={test_case['expected_sat']}, Got SAT={sat}"
-            elif sat and 'expected_assignment' in test_case:
-                if not verify_dpll_assignment(test_case['clauses'], assignment):
-                    result['error'] = f"Assignment {assignment} does not satisfy the formula"
-                else:
-                    result['passed'] = True
-                    passed += 1
+            options = dict(test_case.get('options', {}))
+            if 'budget' in options:
+                options['budget'] = Budget(**options['budget'])
+            solver = cube_and_conquer if test_case.get('solver') == 'cube_and_conquer' else dpll
+            sat, assignment = solver(clauses, **options)
+            expected_sat = UNKNOWN if test_case['expected_sat'] == 'unknown' else test_case['expected_sat']
+            expected_assignment = test_case.get('expected_assignment', {})
+            if sat is not expected_sat:
+                result['error'] = f"Expected SAT={expected_sat}, Got SAT={sat}"
+            elif sat is True and not verify_dpll_assignment(test_case['clauses'], assignment):
+                result['error'] = f"Assignment {assignment} does not satisfy the formula"
+            elif sat is True and any(assignment.get(v) != val for v, val in expected_assignment.items()):
+                result['error'] = f"Expected assignment {expected_assignment}, Got {assignment}"
             else:
                 result['passed'] = True
                 passed += 1
@@ -200,6 +208,165 @@ def test_dpll(test_cases: List[Dict]) -> Tuple[int, List[Dict]]:
         results.append(result)
     return passed, results
 
+
+def run_solver_steps(steps: List[Dict]) -> Optional[str]:
+    """Runs a Solver script; returns an error message or None."""
+    solver = Solver()
+    scopes = [[]]       # clauses added at each scope level
+    for k, step in enumerate(steps, 1):
+        op = step['op']
+        try:
+            if op == 'add':
+                for clause in step.get('clauses', [step.get('clause')]):
+                    solver.add_clause(clause)
+                    scopes[-1].append(clause)
+            elif op == 'push':
+                solver.push()
+                scopes.append([])
+            elif op == 'pop':
+                solver.pop()
+                scopes.pop()
+            else:
+                budget = Budget(**step['budget']) if 'budget' in step else None
+                sat, out = solver.solve(step.get('assumptions', []), budget=budget)
+                expected_sat = UNKNOWN if step['expected_sat'] == 'unknown' else step['expected_sat']
+                if sat is not expected_sat:
+                    return f"Step {k}: Expected SAT={expected_sat}, Got SAT={sat}"
+                if sat is True:
+                    clauses = [c for level in scopes for c in level] + [[a] for a in step.get('assumptions', [])]
+                    if not verify_dpll_assignment(clauses, out):
+                        return f"Step {k}: Model {out} does not satisfy the clauses and assumptions"
+                elif sat is False and 'expected_core' in step and set(out) != set(step['expected_core']):
+                    return f"Step {k}: Expected core {step['expected_core']}, Got {out}"
+        except Exception as e:
+            if step.get('expected_error') != type(e).__name__:
+                raise
+            continue
+        if 'expected_error' in step:
+            return f"Step {k}: Expected {step['expected_error']}"
+    return None
+
+
+def test_solver(test_cases: List[Dict]) -> Tuple[int, List[Dict]]:
+    if not SOLVER_IMPORT_SUCCESS or not DPLL_IMPORT_SUCCESS:
+        return 0, []
+    passed = 0
+    results = []
+    for test_case in test_cases:
+        result = {
+            'id': test_case['id'],
+            'description': test_case['description'],
+            'passed': False,
+            'error': None
+        }
+        try:
+            result['error'] = run_solver_steps(test_case['steps'])
+            if result['error'] is None:
+                result['passed'] = True
+                passed += 1
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {str(e)}"
+        results.append(result)
+    return passed, results
+
+
+def test_allsat(test_cases: List[Dict]) -> Tuple[int, List[Dict]]:
+    if not ALLSAT_IMPORT_SUCCESS:
+        return 0, []
+    passed = 0
+    results = []
+    for test_case in test_cases:
+        result = {
+            'id': test_case['id'],
+            'description': test_case['description'],
+            'passed': False,
+            'error': None
+        }
+        try:
+            options = dict(test_case.get('options', {}))
+            variables = options.get('project') or sorted({l.lstrip('~') for c in test_case['clauses'] for l in c})
+            if options.pop('clause_db', False):
+                # a ClauseDB must come back unchanged, so enumerating twice gives the same models
+                db = ClauseDB.from_clauses(test_case['clauses'])
+                models = list(iter_models(db, **options))
+                again = list(iter_models(db, **options))
+                if normalize_cnf(db.to_clauses()) != normalize_cnf(test_case['clauses']):
+                    result['error'] = "iter_models changed the ClauseDB it was given"
+                elif again != models:
+                    result['error'] = f"Second enumeration gave {len(again)} models instead of {len(models)}"
+            else:
+                models = list(iter_models([set(c) for c in test_case['clauses']], **options))
+            # a partial model stands for all its completions on the variables
+            covered = sum(2 ** (len(variables) - len(m)) for m in models)
+            seen = set()
+            for m in models:
+                key = frozenset(m.items())
+                if key in seen:
+                    result['error'] = f"Model {m} returned twice"
+                elif 'project' in options and set(m) != set(variables):
+                    result['error'] = f"Model {m} is not an assignment of {variables}"
+                elif 'project' not in options and not verify_dpll_assignment(test_case['clauses'], m):
+                    result['error'] = f"Model {m} does not satisfy the formula"
+                seen.add(key)
+            if result['error'] is None and covered != test_case['expected_models']:
+                result['error'] = f"Expected {test_case['expected_models']} models, Got {covered}"
+            if result['error'] is None:
+                result['passed'] = True
+                passed += 1
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {str(e)}"
+        results.append(result)
+    return passed, results
+
+
+def test_dimacs(test_cases: List[Dict]) -> Tuple[int, List[Dict]]:
+    if not DIMACS_IMPORT_SUCCESS:
+        return 0, []
+    openers = {'': open, '.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+    passed = 0
+    results = []
+    for test_case in test_cases:
+        result = {
+            'id': test_case['id'],
+            'description': test_case['description'],
+            'passed': False,
+            'error': None
+        }
+        try:
+            suffix = test_case.get('compression', '')
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'test.cnf' + suffix)
+                with openers[suffix](path, 'wb') as f:
+                    f.write(test_case['text'].encode())
+                if 'expected_error' in test_case:
+                    try:
+                        read_dimacs(path)
+                        result['error'] = "Expected a ValueError"
+                    except ValueError as e:
+                        if test_case['expected_error'] not in str(e):
+                            result['error'] = f"Expected an error at {test_case['expected_error']}, Got: {e}"
+                else:
+                    db = read_dimacs(path)
+                    actual = [[db.lit_name(l) for l in c] for c in db]
+                    # writing and reading back keeps clauses and names
+                    out = io.StringIO()
+                    write_dimacs(db, out)
+                    with open(os.path.join(tmp, 'copy.cnf'), 'w') as f:
+                        f.write(out.getvalue())
+                    copy = read_dimacs(os.path.join(tmp, 'copy.cnf'))
+                    if not cnf_equals(actual, test_case['expected_clauses']):
+                        result['error'] = f"Expected: {test_case['expected_clauses']}, Got: {actual}"
+                    elif copy.names != db.names or [list(c) for c in copy] != [list(c) for c in db]:
+                        result['error'] = f"Round trip changed the formula: {out.getvalue()!r}"
+            if result['error'] is None:
+                result['passed'] = True
+                passed += 1
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {str(e)}"
+        results.append(result)
+    return passed, results
+
+
 def print_results(module_name: str, results: List[Dict], passed: int, total: int):
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}")
     print(f"{Colors.BOLD}{Colors.CYAN}{module_name} Test Results{Colors.END}")
@@ -221,45 +388,41 @@ def print_results(module_name: str, results: List[Dict], passed: int, total: int
 def main():
     print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}")
     print(f"{Colors.BOLD}{Colors.BLUE}Propositional Logic Autograder{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}Testing: to_cnf.py and dpll.py{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}Testing: to_cnf.py, dpll.py, solver.py, allsat.py and dimacs.py{Colors.END}")
     print(f"{Colors.BOLD}{Colors.BLUE}{'='*70}{Colors.END}\n")
     testcases_dir = os.path.join(os.path.dirname(__file__), 'testcases')
-    try:
-        with open(os.path.join(testcases_dir, 'cnf_test_cases.json'), 'r') as f:
-            cnf_test_cases = json.load(f)['test_cases']
-    except Exception as e:
-        print(f"{Colors.RED}Error loading CNF test cases: {e}{Colors.END}")
-        cnf_test_cases = []
-    try:
-        with open(os.path.join(testcases_dir, 'dpll_test_cases.json'), 'r') as f:
-            dpll_test_cases = json.load(f)['test_cases']
-    except Exception as e:
-        print(f"{Colors.RED}Error loading DPLL test cases: {e}{Colors.END}")
-        dpll_test_cases = []
-    if CNF_IMPORT_SUCCESS:
-        cnf_passed, cnf_results = test_to_cnf(cnf_test_cases)
-        cnf_total = len(cnf_test_cases)
-        print_results("to_cnf.py", cnf_results, cnf_passed, cnf_total)
-    else:
-        cnf_passed, cnf_total = 0, len(cnf_test_cases)
-    if DPLL_IMPORT_SUCCESS:
-        dpll_passed, dpll_results = test_dpll(dpll_test_cases)
-        dpll_total = len(dpll_test_cases)
-        print_results("dpll.py", dpll_results, dpll_passed, dpll_total)
-    else:
-        dpll_passed, dpll_total = 0, len(dpll_test_cases)
-    total_passed = cnf_passed + dpll_passed
-    total_tests = cnf_total + dpll_total
+    sections = [
+        ("to_cnf.py", "CNF", 'cnf_test_cases.json', CNF_IMPORT_SUCCESS, test_to_cnf),
+        ("dpll.py", "DPLL", 'dpll_test_cases.json', DPLL_IMPORT_SUCCESS, test_dpll),
+        ("solver.py", "Solver", 'solver_test_cases.json', SOLVER_IMPORT_SUCCESS, test_solver),
+        ("allsat.py", "All-SAT", 'allsat_test_cases.json', ALLSAT_IMPORT_SUCCESS, test_allsat),
+        ("dimacs.py", "DIMACS", 'dimacs_test_cases.json', DIMACS_IMPORT_SUCCESS, test_dimacs),
+    ]
+    summary = []
+    for module_name, label, filename, imported, run in sections:
+        try:
+            with open(os.path.join(testcases_dir, filename), 'r') as f:
+                test_cases = json.load(f)['test_cases']
+        except Exception as e:
+            print(f"{Colors.RED}Error loading {label} test cases: {e}{Colors.END}")
+            test_cases = []
+        if imported:
+            passed, results = run(test_cases)
+            print_results(module_name, results, passed, len(test_cases))
+        else:
+            passed = 0
+        summary.append((module_name, passed, len(test_cases)))
+    total_passed = sum(passed for _, passed, _ in summary)
+    total_tests = sum(total for _, _, total in summary)
     overall_percentage = (total_passed / total_tests * 100) if total_tests > 0 else 0
     print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}")
     print(f"{Colors.BOLD}{Colors.CYAN}Overall Results{Colors.END}")
     print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}\n")
-    print(f"to_cnf.py:  {cnf_passed}/{cnf_total} tests passed")
-    print(f"dpll.py:    {dpll_passed}/{dpll_total} tests passed")
+    for module_name, passed, total in summary:
+        print(f"{module_name + ':':<12}{passed}/{total} tests passed")
     print(f"{Colors.BOLD}{'-'*70}{Colors.END}")
     color = Colors.GREEN if overall_percentage >= 70 else Colors.YELLOW if overall_percentage >= 50 else Colors.RED
     print(f"{Colors.BOLD}Total: {color}{total_passed}/{total_tests} tests passed ({overall_percentage:.1f}%){Colors.END}\n")
 
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,349 @@
+"""
+Conflict-driven clause learning on top of the watched-literal engine.
+
+Each assignment records its decision level and the clause that implied
+it, which gives the implication graph. On a conflict the graph is cut at
+the first unique implication point (first UIP), the resulting clause is
+learned and the search jumps back to the second highest level in it.
+"""
+
+import time
+from array import array
+from typing import Callable, List, Optional
+
+from stats import UNKNOWN, Budget, Result, Stats
+from watched import WatchedFormula
+
+
+def luby(i: int) -> int:
+    """i-th element (0-based) of the Luby sequence 1 1 2 1 1 2 4 1 ..."""
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
+
+class CDCLSolver(WatchedFormula):
+    def __init__(self, clauses, restarts: str = "luby", restart_base: int = 100,
+                 heuristic="vsids", seed=None, exchange=None):
+        if restarts not in ("luby", "glucose"):
+            raise ValueError(f"unknown restart policy: {restarts}")
+        self.level = [0]        # var -> decision level of its assignment
+        self.reason = [None]    # var -> index of the implying clause, or None
+        self.learnts = []       # indices of learned clauses
+        self.lbd = {}           # learned clause index -> literal block distance
+        self.conflict = []      # failed assumptions after an UNSAT solve()
+        self.exchange = exchange  # shares short learned clauses (see portfolio)
+        self.restarts = restarts
+        self.restart_base = restart_base
+        super().__init__(clauses, heuristic, seed)
+        self.max_learnts = max(2000, len(self.db) // 3)
+
+    def grow(self) -> None:
+        super().grow()
+        extra = self.db.num_vars + 1 - len(self.level)
+        if extra > 0:
+            self.level.extend([0] * extra)
+            self.reason.extend([None] * extra)
+
+    def enqueue(self, lit: int, reason: Optional[int] = None) -> bool:
+        val = self.val[lit]
+        if val is not None:
+            return val
+        self.val[lit] = True
+        self.val[lit ^ 1] = False
+        self.level[lit >> 1] = len(self.trail_lim)
+        self.reason[lit >> 1] = reason
+        self.trail.append(lit)
+        return True
+
+    def analyze(self, confl: int):
+        """
+        First-UIP conflict analysis.
+        Returns (learnt clause, backjump level, lbd); learnt[0] is the
+        asserting literal.
+        """
+        lits = self.db.lits
+        starts = self.db.starts
+        level = self.level
+        reason = self.reason
+        trail = self.trail
+        bump = self.heuristic.bump
+        dl = self.decision_level()
+        seen = set()
+        learnt = [0]
+        counter = 0
+        p = None
+        idx = len(trail) - 1
+        while True:
+            # the implied literal of a reason clause sits in its first slot
+            s = starts[confl] if p is None else starts[confl] + 1
+            for k in range(s, starts[confl + 1]):
+                q = lits[k]
+                v = q >> 1
+                if v in seen or level[v] == 0:
+                    continue
+                seen.add(v)
+                bump(v)
+                if level[v] >= dl:
+                    counter += 1
+                else:
+                    learnt.append(q)
+            # walk back to the next literal of the current level in the graph
+            while trail[idx] >> 1 not in seen:
+                idx -= 1
+            p = trail[idx]
+            idx -= 1
+            seen.discard(p >> 1)
+            counter -= 1
+            if counter == 0:
+                break
+            confl = reason[p >> 1]
+        learnt[0] = p ^ 1
+
+        # drop literals implied by the other literals of the clause
+        kept = [learnt[0]]
+        for q in learnt[1:]:
+            r = reason[q >> 1]
+            if r is None or any(lits[k] >> 1 not in seen and level[lits[k] >> 1] > 0
+                                for k in range(starts[r] + 1, starts[r + 1])):
+                kept.append(q)
+        learnt = kept
+
+        if len(learnt) == 1:
+            return learnt, 0, 1
+        # watch the literal of the highest remaining level second
+        best = max(range(1, len(learnt)), key=lambda k: level[learnt[k] >> 1])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        lbd = len({level[q >> 1] for q in learnt})
+        return learnt, level[learnt[1] >> 1], lbd
+
+    def add_learnt(self, learnt: List[int], lbd: int) -> None:
+        if self.exchange is not None and len(learnt) <= self.exchange.max_len:
+            self.exchange.export(learnt)
+        if len(learnt) == 1:
+            self.enqueue(learnt[0])
+            return
+        ci = self.db.add_clause(learnt)
+        self.deleted.append(0)
+        self.watches[learnt[0]].append(ci)
+        self.watches[learnt[1]].append(ci)
+        self.learnts.append(ci)
+        self.lbd[ci] = lbd
+        self.enqueue(learnt[0], ci)
+
+    def locked(self, ci: int) -> bool:
+        first = self.db.lits[self.db.starts[ci]]
+        return self.reason[first >> 1] == ci and self.val[first] is True
+
+    def reduce_db(self) -> None:
+        """Deletes the less useful half of the learned clauses (by LBD)."""
+        starts = self.db.starts
+        self.learnts.sort(key=lambda ci: (self.lbd[ci], starts[ci + 1] - starts[ci]))
+        half = len(self.learnts) // 2
+        kept = []
+        for k, ci in enumerate(self.learnts):
+            if k < half or self.lbd[ci] <= 2 or self.locked(ci):
+                kept.append(ci)
+            else:
+                self.deleted[ci] = 1
+                del self.lbd[ci]
+        self.stats.deleted_clauses += len(self.learnts) - len(kept)
+        self.learnts = kept
+        self.max_learnts = int(self.max_learnts * 1.1)
+        if 2 * sum(self.deleted) > len(self.deleted):
+            self.collect_garbage()
+
+    def collect_garbage(self) -> None:
+        """Compacts the clause store, dropping deleted clauses."""
+        db = self.db
+        lits, starts = db.lits, db.starts
+        new_lits = array('i')
+        new_starts = array('i', [0])
+        remap = {}
+        for ci in range(len(db)):
+            if not self.deleted[ci]:
+                remap[ci] = len(new_starts) - 1
+                new_lits.extend(lits[starts[ci]:starts[ci + 1]])
+                new_starts.append(len(new_lits))
+        db.lits, db.starts = new_lits, new_starts
+        self.deleted = bytearray(len(db))
+
+        # the watched literals are the first two of every clause
+        for ws in self.watches:
+            ws.clear()
+        for ci in range(len(db)):
+            s, e = new_starts[ci], new_starts[ci + 1]
+            if e - s >= 2:
+                self.watches[new_lits[s]].append(ci)
+                self.watches[new_lits[s + 1]].append(ci)
+        for lit in self.trail:
+            r = self.reason[lit >> 1]
+            if r is not None:
+                self.reason[lit >> 1] = remap[r]
+        self.learnts = [remap[ci] for ci in self.learnts]
+        self.lbd = {remap[ci]: lbd for ci, lbd in self.lbd.items()}
+
+    def analyze_final(self, p: int) -> List[int]:
+        """
+        p is true but its negation was assumed. Returns the assumptions
+        that imply p, including the negation of p itself.
+        """
+        core = [p ^ 1]
+        if self.decision_level() == 0:
+            return core
+        lits = self.db.lits
+        starts = self.db.starts
+        seen = {p >> 1}
+        for i in range(len(self.trail) - 1, self.trail_lim[0] - 1, -1):
+            x = self.trail[i]
+            v = x >> 1
+            if v not in seen:
+                continue
+            r = self.reason[v]
+            if r is None:
+                core.append(x)      # every decision so far is an assumption
+            else:
+                for k in range(starts[r] + 1, starts[r + 1]):
+                    if self.level[lits[k] >> 1] > 0:
+                        seen.add(lits[k] >> 1)
+            seen.discard(v)
+        return core
+
+    def block(self, lits: List[int]) -> None:
+        """
+        Adds a clause that the current complete assignment falsifies (e.g.
+        a blocking clause excluding the model just found) and backtracks
+        only as far as needed to make it unit, so that solve(resume=True)
+        continues the search instead of starting over.
+        """
+        level = self.level
+        lits = sorted((l for l in lits if level[l >> 1] > 0),
+                      key=lambda l: -level[l >> 1])
+        if not lits:
+            self.ok = False
+            return
+        if len(lits) == 1:
+            self.cancel_until(0)
+            self.enqueue(lits[0])
+            return
+        top, second = level[lits[0] >> 1], level[lits[1] >> 1]
+        ci = self.db.add_clause(lits)
+        self.deleted.append(0)
+        self.watches[lits[0]].append(ci)
+        self.watches[lits[1]].append(ci)
+        if second < top:
+            self.cancel_until(second)
+            self.enqueue(lits[0], ci)
+        else:
+            self.cancel_until(top - 1)
+
+    def solve(self, assumptions: List[int] = (), resume: bool = False,
+              budget: Optional[Budget] = None,
+              on_progress: Optional[Callable[[Stats], Optional[bool]]] = None,
+              progress_every: int = 1000) -> Result:
+        """
+        Searches for a model in which every assumption literal is true.
+        Learned clauses and heuristic state are kept across calls. After
+        an UNSAT answer self.conflict holds the responsible assumptions.
+        resume continues from the current trail (see block()).
+        Returns UNKNOWN once the budget runs out. on_progress(self.stats)
+        is called every progress_every conflicts and stops the search
+        (UNKNOWN) by returning False.
+        """
+        if budget is not None:
+            budget.start(self.stats)
+        start = time.perf_counter()
+        try:
+            return self.search(assumptions, resume, budget, on_progress, progress_every)
+        finally:
+            self.stats.solve_time += time.perf_counter() - start
+
+    def search(self, assumptions, resume, budget, on_progress, progress_every):
+        stats = self.stats
+        self.conflict = []
+        if not resume:
+            self.cancel_until(0)
+        if not self.ok or (self.decision_level() == 0 and self.propagate() is not None):
+            self.ok = False
+            return False
+
+        conflicts = 0
+        restart_count = 0
+        next_restart = luby(0) * self.restart_base
+        recent_lbd = []         # glucose: lbd of the last 50 conflicts
+        lbd_sum = 0
+
+        while True:
+            confl = self.propagate()
+            if confl is not None:
+                conflicts += 1
+                stats.conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+                t = time.perf_counter()
+                learnt, bt_level, lbd = self.analyze(confl)
+                self.heuristic.decay()
+                self.cancel_until(bt_level)
+                self.add_learnt(learnt, lbd)
+                stats.learnt_clauses += 1
+                stats.analyze_time += time.perf_counter() - t
+
+                lbd_sum += lbd
+                recent_lbd.append(lbd)
+                if len(recent_lbd) > 50:
+                    recent_lbd.pop(0)
+                if (on_progress is not None and stats.conflicts % progress_every == 0
+                        and on_progress(stats) is False):
+                    return UNKNOWN
+                if budget is not None and budget.exceeded(stats):
+                    return UNKNOWN
+                continue
+
+            if self.restarts == "luby":
+                restart = conflicts >= next_restart
+            else:
+                restart = (len(recent_lbd) == 50 and
+                           sum(recent_lbd) / 50 * 0.8 > lbd_sum / conflicts)
+            if restart:
+                restart_count += 1
+                stats.restarts += 1
+                next_restart = conflicts + luby(restart_count) * self.restart_base
+                recent_lbd = []
+                self.cancel_until(0)
+                if self.exchange is not None:
+                    for c in self.exchange.fetch():
+                        self.add_clause(c)
+                    if not self.ok:
+                        return False
+                    continue
+
+            if len(self.learnts) - len(self.trail) >= self.max_learnts:
+                t = time.perf_counter()
+                self.reduce_db()
+                stats.reduce_time += time.perf_counter() - t
+
+            lit = None
+            while self.decision_level() < len(assumptions):
+                p = assumptions[self.decision_level()]
+                if self.val[p] is True:
+                    self.trail_lim.append(len(self.trail))     # empty level
+                elif self.val[p] is False:
+                    self.conflict = self.analyze_final(p ^ 1)
+                    return False
+                else:
+                    lit = p
+                    break
+            if lit is None:
+                lit = self.pick_branch_lit()
+                if lit is None:
+                    return True
+            if budget is not None and budget.exceeded(stats):
+                return UNKNOWN
+            self.decide(lit)
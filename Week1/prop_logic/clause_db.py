@@ -0,0 +1,83 @@
+"""
+Compact clause store for the SAT solvers.
+
+Variables are numbered 1..n in order of first appearance. The literal of
+variable v is 2v when positive and 2v+1 when negated, so the negation of
+a literal is lit ^ 1 and its variable is lit >> 1. All clauses live in a
+single flat array('i'); clause k is lits[starts[k]:starts[k + 1]].
+"""
+
+from array import array
+from typing import Iterable, Iterator, List, Set
+
+
+class ClauseDB:
+    def __init__(self):
+        self.names = [None]             # var index -> name (index 0 unused)
+        self.index = {}                 # name -> var index
+        self.lits = array('i')
+        self.starts = array('i', [0])
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    @property
+    def num_vars(self) -> int:
+        return len(self.names) - 1
+
+    def var(self, name: str) -> int:
+        v = self.index.get(name)
+        if v is None:
+            v = len(self.names)
+            self.index[name] = v
+            self.names.append(name)
+        return v
+
+    def lit(self, s: str) -> int:
+        if s.startswith("~"):
+            return 2 * self.var(s[1:]) + 1
+        return 2 * self.var(s)
+
+    def lit_name(self, lit: int) -> str:
+        name = self.names[lit >> 1]
+        return "~" + name if lit & 1 else name
+
+    def add_clause(self, lits: Iterable[int]) -> int:
+        """Appends a clause of encoded literals and returns its index."""
+        self.lits.extend(dict.fromkeys(lits))
+        self.starts.append(len(self.lits))
+        return len(self.starts) - 2
+
+    def add_str_clause(self, c: Iterable[str]) -> int:
+        return self.add_clause(self.lit(l) for l in c)
+
+    def clause(self, k: int) -> array:
+        return self.lits[self.starts[k]:self.starts[k + 1]]
+
+    def __iter__(self) -> Iterator[array]:
+        for k in range(len(self)):
+            yield self.clause(k)
+
+    def copy(self) -> "ClauseDB":
+        db = ClauseDB()
+        db.names = list(self.names)
+        db.index = dict(self.index)
+        db.lits = array('i', self.lits)
+        db.starts = array('i', self.starts)
+        return db
+
+    @classmethod
+    def from_clauses(cls, clauses: Iterable[Iterable[str]]) -> "ClauseDB":
+        db = cls()
+        for c in clauses:
+            db.add_str_clause(c)
+        return db
+
+    @classmethod
+    def from_any(cls, clauses) -> "ClauseDB":
+        """A private store: a copy of a ClauseDB, or one built from sets of literals."""
+        return clauses.copy() if isinstance(clauses, ClauseDB) else cls.from_clauses(clauses)
+
+    def to_clauses(self) -> List[Set[str]]:
+        return [{self.lit_name(l) for l in c} for c in self]
+
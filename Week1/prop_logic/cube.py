@@ -0,0 +1,162 @@
+"""
+Cube-and-conquer: a lookahead solver splits one hard formula into many
+cubes (partial assignments), which worker processes then solve in
+parallel with dpll().
+
+The cuber branches on the candidate variable whose two polarities both
+propagate the most, scored as the product of the two propagation
+counts. A polarity that propagates to a conflict is a failed literal:
+its negation is added to the cube and the lookahead is repeated, and a
+node where both polarities fail is refuted without producing a cube.
+
+Cubes go into one shared queue and every idle worker takes the next
+one, so load balances dynamically however uneven the cubes turn out.
+The first satisfiable cube ends the run; the formula is UNSAT once
+every cube has been refuted.
+"""
+
+import math
+import multiprocessing
+import os
+from typing import Dict, List, Optional
+
+from clause_db import ClauseDB
+from dpll import dpll
+from procs import get_answer
+from watched import WatchedFormula
+
+
+def _lookahead(f: WatchedFormula, candidates: List[int]):
+    """
+    Returns (status, lit): ("refuted", None), ("forced", failed literal's
+    negation), ("branch", best literal) or ("leaf", None) if nothing is
+    left to branch on.
+    """
+    best, best_score = None, -1
+    for v in candidates:
+        if f.val[2 * v] is not None:
+            continue
+        counts = []
+        for lit in (2 * v, 2 * v + 1):
+            f.decide(lit)
+            confl = f.propagate()
+            counts.append(None if confl is not None else len(f.trail) - f.trail_lim[-1])
+            f.cancel_until(f.decision_level() - 1)
+        if counts[0] is None and counts[1] is None:
+            return "refuted", None
+        if counts[0] is None:
+            return "forced", 2 * v + 1
+        if counts[1] is None:
+            return "forced", 2 * v
+        score = counts[0] * counts[1]
+        if score > best_score:
+            best, best_score = 2 * v | (counts[1] > counts[0]), score
+    if best is None:
+        return "leaf", None
+    return "branch", best
+
+
+def make_cubes(clauses, depth: int, candidates: int = 20) -> List[Dict[str, bool]]:
+    """
+    Splits clauses into at most 2^depth cubes, each a dict var -> bool.
+    The formula is satisfiable iff one of the cubes is.
+    """
+    # the lookahead solver works in its store, so never in the caller's
+    db = ClauseDB.from_any(clauses)
+    f = WatchedFormula(db, heuristic="order")
+    if not f.ok or f.propagate() is not None:
+        return []
+
+    occ = [0] * (db.num_vars + 1)
+    for l in db.lits:
+        occ[l >> 1] += 1
+    ranked = sorted(range(1, db.num_vars + 1), key=lambda v: -occ[v])
+
+    cubes = []
+    stack = [([], 0)]
+    while stack:
+        cube, splits = stack.pop()
+        f.cancel_until(0)
+        refuted = False
+        for lit in cube:
+            f.decide(lit)
+            if f.propagate() is not None:
+                refuted = True
+                break
+        while not refuted:
+            # the most frequent still-open variables are the candidates
+            pool = [v for v in ranked if f.val[2 * v] is None][:candidates]
+            status, lit = _lookahead(f, pool)
+            if status == "forced":
+                cube = cube + [lit]
+                f.decide(lit)
+                refuted = f.propagate() is not None
+                continue
+            refuted = status == "refuted"
+            break
+        if refuted:
+            continue
+        if status == "leaf" or splits >= depth:
+            cubes.append({db.names[l >> 1]: not l & 1 for l in cube})
+        else:
+            stack.append((cube + [lit ^ 1], splits + 1))
+            stack.append((cube + [lit], splits + 1))
+    return cubes
+
+
+def _worker(clauses, tasks, results, mode):
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        k, cube = task
+        try:
+            sat, model = dpll(clauses, dict(cube), mode=mode)
+            results.put((k, sat, model))
+        except Exception as e:
+            results.put((k, e, None))
+
+
+def cube_and_conquer(clauses, workers: Optional[int] = None,
+                     depth: Optional[int] = None, mode: str = "cdcl"):
+    """
+    clauses: list of sets of literals, or a ClauseDB
+    workers: number of processes (default: one per CPU)
+    depth: number of splits per cube (default: about 16 cubes per worker)
+    mode: dpll() mode used on each cube
+    Returns: (sat: bool, assignment), assignment is None when UNSAT.
+             RuntimeError is raised if a worker dies.
+    """
+    workers = workers or os.cpu_count() or 1
+    if depth is None:
+        depth = math.ceil(math.log2(workers)) + 4
+    cubes = make_cubes(clauses, depth)
+    if not cubes:
+        return False, None
+
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    for k, cube in enumerate(cubes):
+        tasks.put((k, cube))
+    procs = [multiprocessing.Process(target=_worker, daemon=True,
+                                     args=(clauses, tasks, results, mode))
+             for _ in range(min(workers, len(cubes)))]
+    for p in procs:
+        tasks.put(None)
+        p.start()
+    try:
+        # workers only exit by themselves once the cubes have run out
+        waiting = {f"cube worker {i}": p for i, p in enumerate(procs)}
+        for _ in cubes:
+            _, sat, model = get_answer(results, waiting)
+            if isinstance(sat, Exception):
+                raise sat
+            if sat:
+                return True, model
+        return False, None
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
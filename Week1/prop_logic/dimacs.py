@@ -0,0 +1,115 @@
+"""
+DIMACS CNF reader and writer.
+
+read_dimacs memory-maps the file and parses it in one streaming pass
+straight into a ClauseDB, so clauses never exist as Python sets. DIMACS
+variable n becomes variable index n of the store, named "n" unless a
+"c var <n> <name>" comment (as written by write_dimacs) names it. Two
+variables ending up with the same name is an error.
+"""
+
+import bz2
+import gzip
+import lzma
+import mmap
+from typing import IO, Iterable, Union
+
+from clause_db import ClauseDB
+
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def _parse(lines: Iterable[bytes]) -> ClauseDB:
+    db = ClauseDB()
+    names = {}
+    name_lines = {}     # var -> line of its "c var" comment
+    clause = []
+    max_var = 0
+
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        head = line[:1]
+        if head == b"c":
+            parts = line.split()
+            if len(parts) == 4 and parts[1] == b"var":
+                v = int(parts[2])
+                if v in names:
+                    raise ValueError(f"line {lineno}: variable {v} is named twice")
+                names[v] = parts[3].decode()
+                name_lines[v] = lineno
+            continue
+        if head == b"p":
+            parts = line.split()
+            if len(parts) != 4 or parts[1] != b"cnf":
+                raise ValueError(f"line {lineno}: bad DIMACS header: {line.decode()!r}")
+            max_var = max(max_var, int(parts[2]))
+            continue
+        if head == b"%":
+            break       # SATLIB end marker
+        for x in map(int, line.split()):
+            if x == 0:
+                db.add_clause(clause)
+                clause = []
+            elif x > 0:
+                clause.append(2 * x)
+                if x > max_var:
+                    max_var = x
+            else:
+                clause.append(-2 * x + 1)
+                if -x > max_var:
+                    max_var = -x
+    if clause:
+        db.add_clause(clause)
+
+    # names must stay distinct, or DIMACS variable v would not be index v
+    for v in range(1, max_var + 1):
+        name = names.get(v, str(v))
+        if name in db.index:
+            other = db.index[name]
+            lineno = name_lines[v] if v in name_lines else name_lines[other]
+            raise ValueError(f"line {lineno}: name {name!r} is used by variables {other} and {v}")
+        db.var(name)
+    return db
+
+
+def read_dimacs(path: str) -> ClauseDB:
+    """Reads a .cnf file (optionally .gz / .bz2 / .xz compressed)."""
+    for ext, opener in OPENERS.items():
+        if path.endswith(ext):
+            with opener(path, "rb") as f:
+                return _parse(f)
+
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:      # empty file
+            return ClauseDB()
+        with mm:
+            return _parse(iter(mm.readline, b""))
+
+
+def write_dimacs(clauses, out: Union[str, IO[str]]) -> None:
+    """
+    Writes clauses (a ClauseDB or a list of sets of literals, as returned
+    by to_cnf) in DIMACS format to a path or text file object. Variable
+    names are kept in "c var <n> <name>" comments.
+    """
+    if not isinstance(clauses, ClauseDB):
+        clauses = ClauseDB.from_clauses(clauses)
+    if isinstance(out, str):
+        with open(out, "w") as f:
+            _write(clauses, f)
+    else:
+        _write(clauses, out)
+
+
+def _write(db: ClauseDB, f: IO[str]) -> None:
+    for v in range(1, db.num_vars + 1):
+        if db.names[v] != str(v):
+            f.write(f"c var {v} {db.names[v]}\n")
+    f.write(f"p cnf {db.num_vars} {len(db)}\n")
+    for c in db:
+        f.write(" ".join(str(-(l >> 1) if l & 1 else l >> 1) for l in c))
+        f.write(" 0\n")
@@ -1,76 +1,145 @@
-def dpll(clauses, assignment=None):
+import time
+from typing import Callable, Optional
+
+from cdcl import CDCLSolver
+from clause_db import ClauseDB
+from portfolio import portfolio
+from preprocess import Preprocessor
+from stats import UNKNOWN, Budget, Result, Stats
+from watched import WatchedFormula
+
+MODES = ("dpll", "cdcl", "portfolio")
+
+
+class DPLLSolver(WatchedFormula):
+    """
+    DPLL with chronological backtracking. The search state is the
+    assignment trail split into decision levels, so backtracking undoes
+    trail entries instead of copying clause lists and nothing recurses.
+    """
+
+    def solve(self, budget: Optional[Budget] = None,
+              on_progress: Optional[Callable[[Stats], Optional[bool]]] = None,
+              progress_every: int = 1000) -> Result:
+        """Same budget and progress options as CDCLSolver.solve."""
+        if budget is not None:
+            budget.start(self.stats)
+        start = time.perf_counter()
+        try:
+            return self.search(budget, on_progress, progress_every)
+        finally:
+            self.stats.solve_time += time.perf_counter() - start
+
+    def search(self, budget, on_progress, progress_every):
+        stats = self.stats
+        if not self.ok or self.propagate() is not None:
+            return False
+
+        flipped = []    # per decision level: True once its decision was negated
+        while True:
+            confl = self.propagate()
+            if confl is not None:
+                stats.conflicts += 1
+                if (on_progress is not None and stats.conflicts % progress_every == 0
+                        and on_progress(stats) is False):
+                    return UNKNOWN
+                if budget is not None and budget.exceeded(stats):
+                    return UNKNOWN
+                db = self.db
+                for k in range(db.starts[confl], db.starts[confl + 1]):
+                    self.heuristic.bump(db.lits[k] >> 1)
+                self.heuristic.decay()
+                # back to the most recent decision whose other branch is open
+                while flipped and flipped[-1]:
+                    flipped.pop()
+                    self.cancel_until(len(flipped))
+                if not flipped:
+                    return False
+                lit = self.trail[self.trail_lim[-1]]
+                self.cancel_until(len(flipped) - 1)
+                self.decide(lit ^ 1)
+                flipped[-1] = True
+                continue
+
+            lit = self.pick_branch_lit()
+            if lit is None:
+                return True
+            if budget is not None and budget.exceeded(stats):
+                return UNKNOWN
+            self.decide(lit)
+            flipped.append(False)
+
+
+def dpll(clauses, assignment=None, mode="dpll", restarts="luby", heuristic="vsids",
+         workers=None, preprocess=False, stats=None, budget=None, on_progress=None,
+         progress_every=1000):
     """
-    clauses: list of sets (e.g. {{'P', '~Q'}, {'Q'}})
+    clauses: list of sets (e.g. {{'P', '~Q'}, {'Q'}}), or a ClauseDB
+             (left untouched; the solvers work on a copy)
     assignment: dict mapping variable -> bool
-    Returns: (sat: bool, assignment)
+    mode: "dpll" (chronological backtracking), "cdcl" (clause learning) or
+          "portfolio" (cdcl solvers racing in `workers` processes)
+    restarts: restart policy of the cdcl mode, "luby" or "glucose"
+    heuristic: branching heuristic, "vsids", "moms", "jw" or "order"
+    preprocess: simplify the clauses first (see preprocess.Preprocessor)
+    stats: a stats.Stats to fill in (by the winning worker in portfolio mode)
+    budget: a stats.Budget limiting conflicts, decisions, time and memory
+    on_progress: called with the stats every progress_every conflicts;
+                 returning False stops the search (not in portfolio mode)
+    Returns: (sat: bool, assignment), or (UNKNOWN, None) if the budget ran out
     """
+    if mode not in MODES:
+        raise ValueError(f"unknown mode: {mode}")
+    if mode == "portfolio" and on_progress is not None:
+        raise ValueError("on_progress cannot be used in portfolio mode")
     if assignment is None:
         assignment = {}
 
-    if not clauses:
+    # the solvers work in the store they are given, so never the caller's
+    clauses = ClauseDB.from_any(clauses)
+    if preprocess or mode == "portfolio":
+        # the assignment goes in as unit clauses; the dpll and cdcl solvers enqueue it
+        for var, val in assignment.items():
+            clauses.add_str_clause([var if val else "~" + var])
+
+    if preprocess:
+        start = time.perf_counter()
+        pre = Preprocessor(clauses)
+        simplified = pre.run()
+        if stats is not None:
+            stats.preprocess_time += time.perf_counter() - start
+        if simplified is None:
+            return False, None
+        sat, model = dpll(simplified, mode=mode, restarts=restarts,
+                          heuristic=heuristic, workers=workers, stats=stats,
+                          budget=budget, on_progress=on_progress,
+                          progress_every=progress_every)
+        if sat is not True:  # False, or UNKNOWN
+            return sat, None
+        assignment.update(pre.extend(model))
+        return True, assignment
+
+    if mode == "portfolio":
+        sat, model = portfolio(clauses, workers, budget=budget, stats=stats)
+        if sat is not True:
+            return sat, None
+        assignment.update(model)
         return True, assignment
-    
-    for c in clauses:
-        if not c or len(c)==0:
+
+    if mode == "cdcl":
+        solver = CDCLSolver(clauses, restarts=restarts, heuristic=heuristic)
+    else:
+        solver = DPLLSolver(clauses, heuristic)
+    if stats is not None:
+        solver.stats = stats
+    for var, val in assignment.items():
+        if not solver.enqueue(solver.lit(var if val else "~" + var)):
             return False, None
-        
-    def get_var(s):
-        if s.startswith("~"):
-            return s[1:]
-        return s
-
-    def get_val(s):
-        return not s.startswith("~")
-    
-    def get_new_clauses(clas, var, ass):
-        new_clauses = []
-        for c in clas:
-            if ( ass and (var in c) ) or ((not ass) and ("~"+var in c) ):
-                continue
 
-            if ((not ass) and var in c):
-                new_c = c
-                new_c.remove(var)
-                new_clauses.append(new_c)
-            elif (ass and ("~"+var in c) ):
-                new_c = c
-                new_c.remove("~"+ var)
-                new_clauses.append(new_c)
-            else:
-                new_clauses.append(c)
-
-        return new_clauses
-    
-    for c in clauses:
-        if len(c)==1:
-            s = next(iter(c))
-            if get_var(s) in assignment and get_val(s)!=assignment[get_var(s)]:
-                return False, None
-            
-            assignment[get_var(s)] = get_val(s)
-            return dpll(get_new_clauses(clauses,get_var(s),get_val(s)),assignment)
-        
-    all_vars = set.union(*clauses)
-    for v in all_vars:
-        v1 = get_var(v)
-        if (v1 not in all_vars) and (v1 not in assignment):
-            assignment[v1] = get_val(v)
-            return dpll(get_new_clauses(clauses,v1,get_val(v)),assignment)
-        elif ("~"+v1 not in all_vars) and (v1 not in assignment):
-            assignment[v1] = get_val(v)
-            return dpll(get_new_clauses(clauses,v1,get_val(v)),assignment)
-
-    dp_lit = next(iter(clauses[0]))
-    dp_var = get_var(dp_lit)
-    assignment[dp_var] = True
-    ass2 = assignment
-    sat, ass = dpll(get_new_clauses(clauses,dp_var,True),ass2)
-
-    if sat:
-        return True, ass
-    
-    assignment[dp_var] = False
-    return dpll(get_new_clauses(clauses,dp_var,False),assignment)
-
-
-    raise NotImplementedError
\ No newline at end of file
+    sat = solver.solve(budget=budget, on_progress=on_progress,
+                       progress_every=progress_every)
+    if sat is not True:
+        return sat, None
+
+    assignment.update(solver.model())
+    return True, assignment
@@ -0,0 +1,111 @@
+"""
+Parser for propositional formulas such as "(P -> Q) & ~R".
+
+Operators, loosest first:
+    <->   equivalence     left-associative
+    ->    implication     right-associative
+    |     disjunction     left-associative
+    &     conjunction     left-associative
+    ~     negation        prefix
+Identifiers are letters, digits and underscores not starting with a
+digit; True / False and 1 / 0 are the constants.
+
+The tokenizer and the operator-precedence parser make one pass over the
+input. Pending operators and operands live on explicit stacks, so deep
+nesting does not run into the recursion limit. A <-> B is built as
+(A -> B) & (B -> A), with A and B shared.
+"""
+
+import re
+from typing import Iterator, Tuple
+
+from to_cnf import And, Const, Expr, Implies, Not, Or, Var
+
+_TOKEN = re.compile(r"\s*(?:(<->|->|[~&|()])|([A-Za-z_][A-Za-z0-9_]*|[01](?![0-9])))")
+
+_BINARY = {"<->": (1, "left"), "->": (2, "right"), "|": (3, "left"), "&": (4, "left")}
+_CONSTANTS = {"True": True, "False": False, "1": True, "0": False}
+
+
+class ParseError(ValueError):
+    def __init__(self, message: str, text: str, pos: int):
+        line = text.count("\n", 0, pos) + 1
+        col = pos - (text.rfind("\n", 0, pos) + 1) + 1
+        super().__init__(f"{message} at line {line}, column {col}")
+        self.pos = pos
+
+
+def tokenize(text: str) -> Iterator[Tuple[str, str, int]]:
+    """Yields (kind, text, position) with kind "op", "name" or "end"."""
+    pos, n = 0, len(text)
+    while True:
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            start = len(text) - len(text[pos:].lstrip())
+            if start == n:
+                yield "end", "", n
+                return
+            raise ParseError(f"unexpected character {text[start]!r}", text, start)
+        k = m.lastindex
+        yield ("op" if k == 1 else "name"), m.group(k), m.start(k)
+        pos = m.end()
+
+
+def _build(op: str, left: Expr, right: Expr) -> Expr:
+    if op == "&":
+        return And(left, right)
+    if op == "|":
+        return Or(left, right)
+    if op == "->":
+        return Implies(left, right)
+    return And(Implies(left, right), Implies(right, left))
+
+
+def parse(text: str) -> Expr:
+    """Parses a formula. Raises ParseError (a ValueError) on bad input."""
+    operands = []
+    ops = []        # (operator, position): "~", "(" or a binary operator
+
+    def reduce_top():
+        op, _ = ops.pop()
+        if op == "~":
+            operands.append(Not(operands.pop()))
+        else:
+            right = operands.pop()
+            operands.append(_build(op, operands.pop(), right))
+
+    expect_operand = True
+    for kind, tok, pos in tokenize(text):
+        if expect_operand:
+            if kind == "name":
+                operands.append(Const(_CONSTANTS[tok]) if tok in _CONSTANTS else Var(tok))
+                expect_operand = False
+            elif tok in ("~", "("):
+                ops.append((tok, pos))
+            else:
+                found = "end of input" if kind == "end" else repr(tok)
+                raise ParseError(f"expected a formula but found {found}", text, pos)
+        elif tok in _BINARY:
+            prec, assoc = _BINARY[tok]
+            while ops and ops[-1][0] != "(":
+                top = ops[-1][0]
+                top_prec = 5 if top == "~" else _BINARY[top][0]
+                if top_prec < prec or (top_prec == prec and assoc == "right"):
+                    break
+                reduce_top()
+            ops.append((tok, pos))
+            expect_operand = True
+        elif tok == ")":
+            while ops and ops[-1][0] != "(":
+                reduce_top()
+            if not ops:
+                raise ParseError("unmatched ')'", text, pos)
+            ops.pop()
+        elif kind == "end":
+            while ops:
+                if ops[-1][0] == "(":
+                    raise ParseError("unclosed '('", text, ops[-1][1])
+                reduce_top()
+            return operands[0]
+        else:
+            raise ParseError(f"expected an operator but found {tok!r}", text, pos)
@@ -0,0 +1,235 @@
+"""
+Branching heuristics for the SAT solvers.
+
+A heuristic only chooses the next decision variable; the polarity comes
+from the solver's saved phases (the value each variable had when it was
+last unassigned), which heuristics may seed in init(). A random seed
+perturbs tie-breaking, which is how portfolio workers diversify.
+
+The solver calls grow() whenever variables are added, init() once its
+clauses are loaded, pick() for every decision, bump() / decay() on
+conflicts and unassign() for every variable taken off the trail.
+"""
+
+import random
+from typing import Optional
+
+
+class OrderHeuristic:
+    """Branches on the first unassigned variable of a fixed order."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = random.Random(seed) if seed is not None else None
+        self.order = []     # variables in branching order
+        self.rank = [0]     # var -> position in order
+        self.next = 0       # no variable before this position is unassigned
+
+    def grow(self, num_vars: int) -> None:
+        for v in range(len(self.rank), num_vars + 1):
+            self.rank.append(len(self.order))
+            self.order.append(v)
+
+    def init(self, solver) -> None:
+        self.solver = solver
+        if self.rng is not None:
+            self.rng.shuffle(self.order)
+            self.set_order(self.order)
+
+    def set_order(self, order) -> None:
+        self.order = list(order)
+        for k, v in enumerate(self.order):
+            self.rank[v] = k
+        self.next = 0
+
+    def pick(self) -> Optional[int]:
+        val = self.solver.val
+        order = self.order
+        for k in range(self.next, len(order)):
+            if val[2 * order[k]] is None:
+                self.next = k
+                return order[k]
+        self.next = len(order)
+        return None
+
+    def bump(self, v: int) -> None:
+        pass
+
+    def decay(self) -> None:
+        pass
+
+    def unassign(self, v: int) -> None:
+        if self.rank[v] < self.next:
+            self.next = self.rank[v]
+
+
+class JeroslowWang(OrderHeuristic):
+    """
+    Two-sided Jeroslow-Wang: J(l) is the sum of 2^-|C| over the clauses C
+    containing l. Variables are ordered by J(v) + J(~v) and start on the
+    side with the larger J.
+
+    The scores are computed once, on the input clauses, and not updated as
+    clauses become satisfied: that would mean visiting every clause of a
+    literal on each assignment, which the watched-literal scheme exists to
+    avoid. The order is a static approximation of the dynamic rule.
+    """
+
+    def init(self, solver) -> None:
+        super().init(solver)
+        db = solver.db
+        j = [0.0] * (2 * db.num_vars + 2)
+        for c in db:
+            w = 2.0 ** -len(c)
+            for l in c:
+                j[l] += w
+        self.set_order(sorted(self.order, key=lambda v: -(j[2 * v] + j[2 * v + 1])))
+        for v in range(1, db.num_vars + 1):
+            solver.phase[v] = j[2 * v + 1] > j[2 * v]
+
+
+class MOMS(OrderHeuristic):
+    """
+    Maximum Occurrences in clauses of Minimum Size: f(l) counts l in the
+    shortest non-unit clauses and variables are ordered by
+    (f(v) + f(~v)) * 2^K + f(v) * f(~v), ties broken by total occurrences.
+
+    Like JeroslowWang, the counts are taken once on the input clauses, a
+    static approximation of counting only the unsatisfied clauses at each
+    decision.
+    """
+    K = 4
+
+    def init(self, solver) -> None:
+        super().init(solver)
+        db = solver.db
+        sizes = [len(c) for c in db if len(c) > 1]
+        min_size = min(sizes) if sizes else 0
+        f = [0] * (2 * db.num_vars + 2)
+        occ = [0] * (2 * db.num_vars + 2)
+        for c in db:
+            for l in c:
+                occ[l] += 1
+                if len(c) == min_size:
+                    f[l] += 1
+
+        def score(v):
+            p, n = f[2 * v], f[2 * v + 1]
+            return ((p + n) * 2 ** self.K + p * n, occ[2 * v] + occ[2 * v + 1])
+
+        self.set_order(sorted(self.order, key=score, reverse=True))
+        for v in range(1, db.num_vars + 1):
+            solver.phase[v] = f[2 * v + 1] > f[2 * v]
+
+
+class VSIDS:
+    """
+    Variable State Independent Decaying Sum: every variable involved in a
+    conflict has its activity bumped, and older bumps decay geometrically
+    (by growing the increment instead of shrinking every activity). The
+    unassigned variable of highest activity is kept on top of a binary heap.
+    """
+
+    def __init__(self, seed: Optional[int] = None, decay: float = 0.95):
+        self.rng = random.Random(seed) if seed is not None else None
+        self.decay_factor = decay
+        self.activity = [0.0]   # var -> activity
+        self.heap = []          # binary max-heap of vars by activity
+        self.pos = [-1]         # var -> index in heap, -1 if absent
+        self.inc = 1.0
+
+    def grow(self, num_vars: int) -> None:
+        for v in range(len(self.activity), num_vars + 1):
+            self.activity.append(self.rng.random() * 1e-5 if self.rng else 0.0)
+            self.pos.append(-1)
+            self.insert(v)
+
+    def init(self, solver) -> None:
+        self.solver = solver
+
+    def insert(self, v: int) -> None:
+        if self.pos[v] < 0:
+            self.pos[v] = len(self.heap)
+            self.heap.append(v)
+            self.sift_up(self.pos[v])
+
+    def sift_up(self, i: int) -> None:
+        heap, pos, act = self.heap, self.pos, self.activity
+        v = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if act[heap[parent]] >= act[v]:
+                break
+            heap[i] = heap[parent]
+            pos[heap[i]] = i
+            i = parent
+        heap[i] = v
+        pos[v] = i
+
+    def sift_down(self, i: int) -> None:
+        heap, pos, act = self.heap, self.pos, self.activity
+        v = heap[i]
+        n = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and act[heap[child + 1]] > act[heap[child]]:
+                child += 1
+            if act[heap[child]] <= act[v]:
+                break
+            heap[i] = heap[child]
+            pos[heap[i]] = i
+            i = child
+        heap[i] = v
+        pos[v] = i
+
+    def pop(self) -> int:
+        heap, pos = self.heap, self.pos
+        v = heap[0]
+        pos[v] = -1
+        last = heap.pop()
+        if heap:
+            heap[0] = last
+            pos[last] = 0
+            self.sift_down(0)
+        return v
+
+    def pick(self) -> Optional[int]:
+        val = self.solver.val
+        heap = self.heap
+        while heap:
+            v = heap[0]
+            if val[2 * v] is None:
+                return v
+            self.pop()
+        return None
+
+    def bump(self, v: int) -> None:
+        act = self.activity
+        act[v] += self.inc
+        if act[v] > 1e100:
+            for u in range(1, len(act)):
+                act[u] *= 1e-100
+            self.inc *= 1e-100
+        if self.pos[v] >= 0:
+            self.sift_up(self.pos[v])
+
+    def decay(self) -> None:
+        self.inc /= self.decay_factor
+
+    def unassign(self, v: int) -> None:
+        self.insert(v)
+
+
+HEURISTICS = {
+    "order": OrderHeuristic,
+    "vsids": VSIDS,
+    "moms": MOMS,
+    "jw": JeroslowWang,
+}
+
+
+def make_heuristic(name: str, seed: Optional[int] = None):
+    if name not in HEURISTICS:
+        raise ValueError(f"unknown heuristic: {name}")
+    return HEURISTICS[name](seed)
@@ -0,0 +1,130 @@
+"""
+Portfolio solving: several differently configured CDCL solvers race on
+the same formula in separate processes and the first answer wins.
+
+Workers differ in branching heuristic, restart policy and random seed.
+With sharing enabled they also exchange short learned clauses through a
+ring buffer in shared memory: every learned clause of at most max_len
+literals is published, and each worker imports the clauses published by
+the others whenever it restarts.
+"""
+
+import itertools
+import multiprocessing
+import os
+from typing import Dict, List, Optional
+
+from cdcl import CDCLSolver
+from clause_db import ClauseDB
+from procs import get_answer
+from stats import UNKNOWN, Budget, Stats
+
+
+class ClauseExchange:
+    """Shared ring buffer of short learned clauses (encoded literals)."""
+
+    def __init__(self, max_len: int = 8, slots: int = 4096):
+        self.max_len = max_len
+        self.width = max_len + 2        # slot layout: owner, length, literals
+        self.slots = slots
+        self.buf = multiprocessing.Array('i', slots * self.width)
+        self.head = multiprocessing.Value('q', 0, lock=False)  # slots written
+        self.owner = -1                 # worker id of this process
+        self.cursor = 0                 # next slot this process reads
+
+    def export(self, lits: List[int]) -> None:
+        with self.buf.get_lock():
+            buf = self.buf.get_obj()
+            h = self.head.value
+            base = (h % self.slots) * self.width
+            buf[base] = self.owner
+            buf[base + 1] = len(lits)
+            buf[base + 2:base + 2 + len(lits)] = lits
+            self.head.value = h + 1
+
+    def fetch(self) -> List[List[int]]:
+        """Clauses published by other workers since the last fetch."""
+        out = []
+        with self.buf.get_lock():
+            buf = self.buf.get_obj()
+            h = self.head.value
+            for i in range(max(self.cursor, h - self.slots), h):
+                base = (i % self.slots) * self.width
+                if buf[base] != self.owner:
+                    out.append(buf[base + 2:base + 2 + buf[base + 1]])
+            self.cursor = h
+        return out
+
+
+def default_configs(n: int) -> List[Dict]:
+    """n configurations cycling through heuristics and restart policies."""
+    combos = itertools.cycle(itertools.product(
+        ("vsids", "jw", "moms"), ("luby", "glucose")))
+    return [{"heuristic": h, "restarts": r, "seed": i or None}
+            for i, (h, r) in zip(range(n), combos)]
+
+
+def _worker(wid, db, config, exchange, results, budget):
+    try:
+        if exchange is not None:
+            exchange.owner = wid
+        solver = CDCLSolver(db, exchange=exchange, **config)
+        sat = solver.solve(budget=budget)
+        results.put((wid, sat, solver.model() if sat is True else None, solver.stats))
+    except Exception as e:
+        results.put((wid, e, None, None))
+
+
+def portfolio(clauses, workers: Optional[int] = None,
+              configs: Optional[List[Dict]] = None, share: bool = True,
+              budget: Optional[Budget] = None, stats: Optional[Stats] = None):
+    """
+    clauses: list of sets of literals, or a ClauseDB
+    workers: number of processes (default: one per CPU)
+    configs: CDCLSolver keyword arguments per worker (default_configs)
+    share: exchange short learned clauses between workers
+    budget: a stats.Budget applied to every worker
+    stats: a stats.Stats the winning worker's statistics are added to
+    Returns: (sat: bool, assignment), assignment is None when UNSAT;
+             (UNKNOWN, None) if every worker ran out of budget.
+             If no worker finishes and one of them failed, its
+             exception is raised; RuntimeError if a worker died.
+    """
+    if not isinstance(clauses, ClauseDB):
+        clauses = ClauseDB.from_clauses(clauses)
+    if configs is None:
+        configs = default_configs(workers or os.cpu_count() or 1)
+
+    exchange = ClauseExchange() if share and len(configs) > 1 else None
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_worker, daemon=True,
+                                     args=(wid, clauses, config, exchange, results, budget))
+             for wid, config in enumerate(configs)]
+    for p in procs:
+        p.start()
+    try:
+        error = None
+        answered = set()
+        for _ in procs:
+            waiting = {f"portfolio worker {wid}": p for wid, p in enumerate(procs)
+                       if wid not in answered}
+            wid, sat, model, worker_stats = get_answer(results, waiting)
+            answered.add(wid)
+            if isinstance(sat, Exception):
+                error = sat
+            elif sat is not UNKNOWN:
+                if stats is not None:
+                    stats.add(worker_stats)
+                break
+        else:
+            # no worker finished: a failure outranks running out of budget
+            if error is not None:
+                raise error
+            sat, model = UNKNOWN, None
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
+    return sat, model
@@ -0,0 +1,352 @@
+"""
+CNF preprocessing between to_cnf() and the solvers.
+
+Preprocessor simplifies a formula with occurrence lists (literal ->
+clauses containing it):
+  - unit propagation at the root,
+  - equivalent literal substitution over the binary implication graph,
+  - subsumption and self-subsuming resolution (strengthening),
+  - bounded variable elimination (only when the clause count does not grow),
+  - failed literal probing.
+
+Every step that changes the set of models is recorded on a
+reconstruction stack, and extend() replays it backwards to turn a model
+of the simplified formula into a full model of the original one.
+"""
+
+from typing import Dict, List, Optional
+
+from clause_db import ClauseDB
+from watched import WatchedFormula
+
+
+class Preprocessor:
+    def __init__(self, clauses):
+        """clauses: a ClauseDB or a list of sets of literals (left untouched)"""
+        db = clauses if isinstance(clauses, ClauseDB) else ClauseDB.from_clauses(clauses)
+        self.names = list(db.names)
+        n = 2 * db.num_vars + 2
+        self.clauses = []               # literal lists, None once removed
+        self.occ = [set() for _ in range(n)]
+        self.val = [None] * n           # root-level literal values
+        self.units = []                 # literals waiting to be propagated
+        self.stack = []                 # reconstruction steps, in order
+        self.ok = True
+        for c in db:
+            self.add(list(c))
+        self.propagate_units()
+
+    def add(self, c: List[int]) -> None:
+        val = self.val
+        if any(val[l] is True for l in c):
+            return      # satisfied
+        c = list(dict.fromkeys(l for l in c if val[l] is None))
+        lits = set(c)
+        if any(l ^ 1 in lits for l in c):
+            return      # tautology
+        if not c:
+            self.ok = False
+        elif len(c) == 1:
+            self.units.append(c[0])
+        else:
+            ci = len(self.clauses)
+            self.clauses.append(c)
+            for l in c:
+                self.occ[l].add(ci)
+
+    def remove(self, ci: int) -> None:
+        for l in self.clauses[ci]:
+            self.occ[l].discard(ci)
+        self.clauses[ci] = None
+
+    def strengthen(self, ci: int, lit: int) -> None:
+        """Removes lit from clause ci."""
+        c = self.clauses[ci]
+        c.remove(lit)
+        self.occ[lit].discard(ci)
+        if len(c) == 1:
+            self.units.append(c[0])
+            self.remove(ci)
+
+    def propagate_units(self) -> None:
+        val = self.val
+        while self.units and self.ok:
+            lit = self.units.pop()
+            if val[lit] is True:
+                continue
+            if val[lit] is False:
+                self.ok = False
+                return
+            val[lit] = True
+            val[lit ^ 1] = False
+            self.stack.append(("unit", lit))
+            for ci in list(self.occ[lit]):
+                self.remove(ci)
+            for ci in list(self.occ[lit ^ 1]):
+                self.strengthen(ci, lit ^ 1)
+
+    def live(self) -> List[int]:
+        return [ci for ci, c in enumerate(self.clauses) if c is not None]
+
+    # -- equivalent literal substitution ----------------------------------
+
+    def substitute_equivalences(self) -> bool:
+        """Merges literals that imply each other through binary clauses."""
+        graph = [[] for _ in self.occ]      # lit -> implied lits
+        for c in self.clauses:
+            if c is not None and len(c) == 2:
+                a, b = c
+                graph[a ^ 1].append(b)
+                graph[b ^ 1].append(a)
+
+        repl = {}
+        for scc in _tarjan(graph):
+            if len(scc) < 2:
+                continue
+            rep = min(scc, key=lambda l: l >> 1)
+            if rep ^ 1 in scc:
+                self.ok = False
+                return False
+            for l in scc:
+                if l != rep and l >> 1 not in repl:
+                    repl[l >> 1] = (l, rep)
+        if not repl:
+            return False
+
+        touched = set()
+        for v, (l, rep) in repl.items():
+            self.stack.append(("equiv", l, rep))
+            touched |= self.occ[2 * v] | self.occ[2 * v + 1]
+        mapping = {}
+        for l, rep in repl.values():
+            mapping[l] = rep
+            mapping[l ^ 1] = rep ^ 1
+        for ci in touched:
+            c = self.clauses[ci]
+            self.remove(ci)
+            self.add([mapping.get(l, l) for l in c])
+        self.propagate_units()
+        return True
+
+    # -- subsumption ------------------------------------------------------
+
+    def subsume(self) -> bool:
+        """
+        Removes clauses subsumed by another one and strengthens D when
+        C with one literal negated is a subset of D.
+        """
+        occ = self.occ
+        changed = False
+        for ci in sorted(self.live(), key=lambda k: len(self.clauses[k])):
+            c = self.clauses[ci]
+            if c is None:
+                continue
+            # every candidate contains the rarest literal of c or its negation
+            best = min(c, key=lambda l: len(occ[l]) + len(occ[l ^ 1]))
+            for di in list(occ[best]) + list(occ[best ^ 1]):
+                d = self.clauses[di]
+                if di == ci or d is None or len(d) < len(c):
+                    continue
+                dset = set(d)
+                flipped = None
+                for l in c:
+                    if l in dset:
+                        continue
+                    if flipped is None and l ^ 1 in dset:
+                        flipped = l ^ 1
+                        continue
+                    break
+                else:
+                    changed = True
+                    if flipped is None:
+                        self.remove(di)
+                    else:
+                        self.strengthen(di, flipped)
+                if self.clauses[ci] is None:
+                    break
+            self.propagate_units()
+            if not self.ok:
+                return changed
+        return changed
+
+    # -- bounded variable elimination -------------------------------------
+
+    def eliminate(self, max_occ: int = 16, max_len: int = 24) -> bool:
+        """
+        Replaces the clauses of a variable by all their non-tautological
+        resolvents when that does not increase the number of clauses.
+        """
+        occ = self.occ
+        changed = False
+        num_vars = len(self.names) - 1
+        for v in sorted(range(1, num_vars + 1),
+                        key=lambda v: len(occ[2 * v]) * len(occ[2 * v + 1])):
+            pos, neg = list(occ[2 * v]), list(occ[2 * v + 1])
+            if not pos and not neg:
+                continue
+            if len(pos) > max_occ and len(neg) > max_occ:
+                continue
+            limit = len(pos) + len(neg)
+            resolvents = []
+            for a in pos:
+                ca = [l for l in self.clauses[a] if l != 2 * v]
+                for b in neg:
+                    r = set(ca)
+                    r.update(l for l in self.clauses[b] if l != 2 * v + 1)
+                    if any(l ^ 1 in r for l in r):
+                        continue
+                    resolvents.append(list(r))
+                    if len(resolvents) > limit or len(r) > max_len:
+                        break
+                else:
+                    continue
+                break
+            else:
+                for ci in pos:
+                    self.stack.append(("elim", 2 * v, list(self.clauses[ci])))
+                for ci in neg:
+                    self.stack.append(("elim", 2 * v + 1, list(self.clauses[ci])))
+                for ci in pos + neg:
+                    self.remove(ci)
+                for r in resolvents:
+                    self.add(r)
+                self.propagate_units()
+                changed = True
+                if not self.ok:
+                    return changed
+        return changed
+
+    # -- failed literal probing -------------------------------------------
+
+    def probe(self, limit: int = 2000) -> bool:
+        """Asserts ~l for every probed literal l that propagates to a conflict."""
+        f = WatchedFormula(self.to_db(), heuristic="order")
+        if not f.ok or f.propagate() is not None:
+            self.ok = False
+            return False
+        occ = self.occ
+        candidates = sorted((v for v in range(1, len(self.names))
+                             if occ[2 * v] or occ[2 * v + 1]),
+                            key=lambda v: -len(occ[2 * v]) - len(occ[2 * v + 1]))
+        found = []
+        for v in candidates[:limit]:
+            for lit in (2 * v, 2 * v + 1):
+                if f.val[lit] is not None:
+                    continue
+                f.decide(lit)
+                confl = f.propagate()
+                f.cancel_until(0)
+                if confl is not None:
+                    found.append(lit ^ 1)
+                    f.enqueue(lit ^ 1)
+                    if f.propagate() is not None:
+                        self.ok = False
+                        return True
+        self.units.extend(found)
+        self.propagate_units()
+        return bool(found)
+
+    # -- driver -----------------------------------------------------------
+
+    def run(self, equiv: bool = True, subsume: bool = True, bve: bool = True,
+            probe: bool = True, rounds: int = 2) -> Optional[ClauseDB]:
+        """
+        Simplifies the formula. Returns the simplified clauses, or None
+        if the formula was found to be unsatisfiable.
+        """
+        for _ in range(rounds):
+            changed = False
+            if self.ok and equiv:
+                changed |= self.substitute_equivalences()
+            if self.ok and subsume:
+                changed |= self.subsume()
+            if self.ok and bve:
+                changed |= self.eliminate()
+            if self.ok and probe:
+                changed |= self.probe()
+            if not self.ok or not changed:
+                break
+        if not self.ok:
+            return None
+        return self.to_db()
+
+    def to_db(self) -> ClauseDB:
+        """Current clauses over the original variable numbering."""
+        db = ClauseDB()
+        for name in self.names[1:]:
+            db.var(name)
+        for c in self.clauses:
+            if c is not None:
+                db.add_clause(c)
+        return db
+
+    def extend(self, model: Dict[str, bool]) -> Dict[str, bool]:
+        """
+        Turns a model of the simplified formula into a model of the
+        original formula.
+        """
+        value = [False] + [bool(model.get(name)) for name in self.names[1:]]
+
+        def true(l):
+            return value[l >> 1] != bool(l & 1)
+
+        for step in reversed(self.stack):
+            if step[0] == "unit":
+                lit = step[1]
+                value[lit >> 1] = not lit & 1
+            elif step[0] == "equiv":
+                _, lit, rep = step
+                value[lit >> 1] = true(rep) != bool(lit & 1)
+            else:
+                _, witness, clause = step
+                if not any(true(l) for l in clause):
+                    value[witness >> 1] = not witness & 1
+        return {name: value[v] for v, name in enumerate(self.names) if v}
+
+
+def _tarjan(graph: List[List[int]]) -> List[List[int]]:
+    """Strongly connected components of graph, without recursion."""
+    index = [None] * len(graph)
+    low = [0] * len(graph)
+    on_stack = [False] * len(graph)
+    stack = []
+    sccs = []
+    counter = 0
+    for root in range(len(graph)):
+        if index[root] is not None or not graph[root]:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, i = work.pop()
+            if i == 0:
+                index[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            recurse = False
+            edges = graph[node]
+            while i < len(edges):
+                w = edges[i]
+                i += 1
+                if index[w] is None:
+                    work.append((node, i))
+                    work.append((w, 0))
+                    recurse = True
+                    break
+                if on_stack[w]:
+                    low[node] = min(low[node], index[w])
+            if recurse:
+                continue
+            if low[node] == index[node]:
+                scc = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    scc.append(w)
+                    if w == node:
+                        break
+                sccs.append(scc)
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+    return sccs
@@ -0,0 +1,32 @@
+"""
+Collecting answers from solver worker processes (see portfolio.py and
+cube.py) without hanging when a worker dies.
+"""
+
+import multiprocessing
+import queue
+from typing import Dict
+
+_POLL = 1.0     # seconds between liveness checks while waiting for answers
+
+
+def get_answer(results, procs: Dict[str, multiprocessing.Process]):
+    """
+    The next item on the results queue. procs maps a name to each worker
+    that may still answer; once one of them has died (killed by a signal
+    or out of memory), or all of them have exited, with nothing left to
+    read, RuntimeError is raised instead of waiting forever.
+    """
+    while True:
+        try:
+            return results.get(timeout=_POLL)
+        except queue.Empty:
+            pass
+        dead = [(name, p.exitcode) for name, p in procs.items() if p.exitcode not in (None, 0)]
+        if dead or not any(p.is_alive() for p in procs.values()):
+            try:
+                # an answer sent just before the worker exited
+                return results.get(timeout=_POLL)
+            except queue.Empty:
+                name, code = dead[0] if dead else (next(iter(procs)), 0)
+                raise RuntimeError(f"{name} died (exit code {code})")
@@ -0,0 +1,90 @@
+"""
+Incremental SAT solving on top of the CDCL engine.
+
+A Solver keeps its clause store, learned clauses, heuristic activities
+and saved phases between calls, so closely related queries reuse the
+work of earlier ones. Queries differ through assumptions (literals that
+hold for one call only) and push/pop scopes. A scope is a fresh selector
+variable s: clauses added inside it are stored as (clause | ~s), and s is
+assumed while the scope is open. Popping asserts ~s for good, which
+satisfies those clauses and every clause learned from them. Selectors
+are named "@scope<n>" in the same store as the user's variables, so that
+prefix is reserved: add_clause() and solve() reject names using it.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from cdcl import CDCLSolver
+from clause_db import ClauseDB
+from stats import UNKNOWN, Budget, Result, Stats
+
+_SELECTOR = "@scope"
+
+
+class Solver:
+    def __init__(self, clauses: Iterable[Iterable[str]] = (),
+                 heuristic="vsids", restarts: str = "luby"):
+        self.engine = CDCLSolver(ClauseDB(), restarts=restarts, heuristic=heuristic)
+        self.scopes = []        # selector literal of every open scope
+        self.selectors = set()  # variable indices used as selectors
+        self.core = []          # failed assumptions of the last UNSAT solve()
+        for c in clauses:
+            self.add_clause(c)
+
+    def add_clause(self, clause: Iterable[str]) -> None:
+        """Adds a clause, scoped to the innermost open push() if any."""
+        engine = self.engine
+        engine.cancel_until(0)
+        lits = [self._lit(l) for l in clause]
+        if self.scopes:
+            lits.append(self.scopes[-1] ^ 1)
+        engine.add_clause(lits)
+
+    def push(self) -> None:
+        engine = self.engine
+        engine.cancel_until(0)
+        s = engine.lit(f"{_SELECTOR}{len(engine.db.names)}")
+        self.selectors.add(s >> 1)
+        self.scopes.append(s)
+
+    def pop(self) -> None:
+        """Discards every clause added since the matching push()."""
+        if not self.scopes:
+            raise IndexError("pop from empty scope stack")
+        engine = self.engine
+        engine.cancel_until(0)
+        engine.add_clause([self.scopes.pop() ^ 1])
+
+    def _lit(self, name: str) -> int:
+        """The literal of a user-supplied name, which may not be a selector's."""
+        if name.lstrip("~").startswith(_SELECTOR):
+            raise ValueError(f"variable names starting with {_SELECTOR!r} are reserved: {name!r}")
+        return self.engine.lit(name)
+
+    @property
+    def stats(self) -> Stats:
+        """Statistics accumulated over every solve() so far."""
+        return self.engine.stats
+
+    def solve(self, assumptions: Iterable[str] = (), budget: Optional[Budget] = None
+              ) -> Tuple[Result, Union[Dict[str, bool], List[str], None]]:
+        """
+        Returns (True, model) or (False, core), where core is a subset of
+        the assumptions that cannot all hold together (empty when the
+        clauses are unsatisfiable on their own), or (UNKNOWN, None) when
+        the budget runs out.
+        """
+        engine = self.engine
+        engine.cancel_until(0)
+        lits = [self._lit(a) for a in assumptions]
+        sat = engine.solve(self.scopes + lits, budget=budget)
+        if sat is UNKNOWN:
+            self.core = []
+            return UNKNOWN, None
+        if sat:
+            self.core = []
+            return True, {name: value for name, value in engine.model().items()
+                          if engine.db.index[name] not in self.selectors}
+        self.core = [engine.db.lit_name(l) for l in engine.conflict
+                     if l >> 1 not in self.selectors]
+        return False, self.core
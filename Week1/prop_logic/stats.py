@@ -0,0 +1,129 @@
+"""
+Solver statistics and resource budgets.
+
+Every solver owns a Stats object that its search updates as it goes
+(decisions, propagations, conflicts, restarts, learned / deleted clauses
+and the time spent per phase). A Budget bounds one solve() call; when it
+runs out the solver stops and returns UNKNOWN instead of True / False.
+"""
+
+import os
+import sys
+import time
+from typing import Optional, Union
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+
+class _Unknown:
+    """
+    The result of a solve() that ran out of budget. It is neither true nor
+    false: using it as a bool raises TypeError, so a result has to be
+    tested with `is UNKNOWN` before `if sat`.
+    """
+
+    def __repr__(self) -> str:
+        return "UNKNOWN"
+
+    def __bool__(self):
+        raise TypeError("UNKNOWN is neither true nor false; test `is UNKNOWN` first")
+
+    def __reduce__(self):
+        return "UNKNOWN"     # unpickles as the module's singleton
+
+
+UNKNOWN = _Unknown()
+Result = Union[bool, _Unknown]     # what solve() returns
+
+
+class Stats:
+    def __init__(self):
+        self.decisions = 0
+        self.propagations = 0       # literals taken off the propagation queue
+        self.conflicts = 0
+        self.restarts = 0
+        self.learnt_clauses = 0
+        self.deleted_clauses = 0
+        self.preprocess_time = 0.0
+        self.propagate_time = 0.0
+        self.analyze_time = 0.0     # conflict analysis and backjumping
+        self.reduce_time = 0.0      # learned clause deletion
+        self.solve_time = 0.0
+
+    def add(self, other: "Stats") -> None:
+        """Adds the counters and times of other to these."""
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def __str__(self) -> str:
+        t = max(self.solve_time, 1e-9)
+        return (f"decisions={self.decisions} propagations={self.propagations} "
+                f"conflicts={self.conflicts} restarts={self.restarts} "
+                f"learnt={self.learnt_clauses} deleted={self.deleted_clauses} "
+                f"time={self.solve_time:.3f}s ({self.conflicts / t:.0f} conflicts/s, "
+                f"propagate {self.propagate_time:.3f}s, analyze {self.analyze_time:.3f}s)")
+
+
+def memory_mb() -> Optional[float]:
+    """
+    Resident set size of this process in MB: the current one where
+    /proc/self/statm exists, else the peak so far from getrusage. None if
+    the platform reports neither.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class Budget:
+    """
+    Limits for one solve() call: conflicts, decisions, wall-clock seconds
+    and memory in MB. None means unlimited. Memory is counted from what
+    the process used when the call started, so earlier work in the same
+    process does not use up the budget.
+    """
+
+    def __init__(self, conflicts: Optional[int] = None, decisions: Optional[int] = None,
+                 seconds: Optional[float] = None, memory_mb: Optional[float] = None):
+        self.conflicts = conflicts
+        self.decisions = decisions
+        self.seconds = seconds
+        self.memory_mb = memory_mb
+
+    def start(self, stats: Stats) -> None:
+        self.max_conflicts = (None if self.conflicts is None
+                              else stats.conflicts + self.conflicts)
+        self.max_decisions = (None if self.decisions is None
+                              else stats.decisions + self.decisions)
+        self.deadline = (None if self.seconds is None
+                         else time.perf_counter() + self.seconds)
+        self.base_memory = memory_mb() if self.memory_mb is not None else None
+        self.checks = 0
+
+    def exceeded(self, stats: Stats) -> bool:
+        if self.max_conflicts is not None and stats.conflicts >= self.max_conflicts:
+            return True
+        if self.max_decisions is not None and stats.decisions >= self.max_decisions:
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return True
+        if self.memory_mb is not None and self.base_memory is not None:
+            # reading the memory use is a system call, so only look every so often
+            self.checks += 1
+            if self.checks % 256 == 0 and memory_mb() - self.base_memory >= self.memory_mb:
+                return True
+        return False
@@ -1,118 +1,468 @@
+import itertools
 import json
 import os
 import sys
-from typing import List, Set, Dict, Tuple, Any
+import weakref
+from typing import List, Set, Dict, Tuple, Any, Iterator
+
+_nodes = weakref.WeakValueDictionary()   # (class, *fields) -> the one node
+
 
 class Expr:
-    pass
+    """
+    Expressions are hash-consed: constructing a node equal to a live one
+    returns that node, so structurally equal subformulas are one object.
+    Equality and hashing are therefore by identity, which costs nothing
+    to compute and agrees with structural equality. The passes below
+    memoize on nodes and therefore do work per distinct subformula.
+    """
+    __slots__ = ("__weakref__",)
+    _fields = ()
+
+    def __new__(cls, *args):
+        key = (cls,) + args
+        node = _nodes.get(key)
+        if node is None:
+            if len(args) != len(cls._fields):
+                raise TypeError(f"{cls.__name__} takes {len(cls._fields)} arguments")
+            node = object.__new__(cls)
+            for field, arg in zip(cls._fields, args):
+                setattr(node, field, arg)
+            _nodes[key] = node
+        return node
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, f) for f in self._fields)
 
 
 class Var(Expr):
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
+    _fields = ("name",)
+
+
+class Const(Expr):
+    """The constant True or False."""
+    __slots__ = ("value",)
+    _fields = ("value",)
 
 
 class Not(Expr):
-    def __init__(self, expr):
-        self.expr = expr
+    __slots__ = ("expr",)
+    _fields = ("expr",)
 
 
 class And(Expr):
-    def __init__(self, left, right):
-        self.left = left
-        self.right = right
+    __slots__ = ("left", "right")
+    _fields = ("left", "right")
 
 
 class Or(Expr):
-    def __init__(self, left, right):
-        self.left = left
-        self.right = right
+    __slots__ = ("left", "right")
+    _fields = ("left", "right")
 
 
 class Implies(Expr):
-    def __init__(self, left, right):
-        self.left = left
-        self.right = right
-
-def rem_implies(expr):
-    if isinstance(expr,Var):
-        return expr
-    elif isinstance(expr,Implies):
-        return Or(Not(rem_implies(expr.left)),rem_implies(expr.right))
-    elif isinstance(expr,Not):
-        return Not(rem_implies(expr.expr))
-    elif isinstance(expr,And):
-        return And(rem_implies(expr.left),rem_implies(expr.right))
-    elif isinstance(expr,Or):
-        return Or(rem_implies(expr.left),rem_implies(expr.right))
-    
-    return expr
-    
-def push_neg(expr):
-    if isinstance(expr,Var):
-        return expr
-    
-    elif isinstance(expr,Not):
-        ins = expr.expr
-        if isinstance(ins,Var):
-            return expr
-        elif isinstance(ins,Not):
-            return push_neg(ins.expr)
-        elif isinstance(ins,And):
-            return Or(push_neg(Not(ins.left)),push_neg(Not(ins.right)))
-        elif isinstance(ins,Or):
-            return And(push_neg(Not(ins.left)), push_neg(Not(ins.right)))
-    
-    elif isinstance(expr,And):
-        return And(push_neg((expr.left)),push_neg((expr.right)))
-    elif isinstance(expr,Or):
-        return Or(push_neg((expr.left)), push_neg((expr.right)))
-    
-    return expr
-    
+    __slots__ = ("left", "right")
+    _fields = ("left", "right")
+
+def _transform(expr, step, memo):
+    """
+    Post-order driver of the rewriting passes, with an explicit stack:
+    step(e) gives (children, build) and e maps to build() applied to the
+    rewritten children. Results are memoized per node in memo.
+    """
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        if e in memo:
+            continue
+        children, build = step(e)
+        pending = [c for c in children if c not in memo]
+        if pending:
+            stack.append(e)
+            stack.extend(pending)
+            continue
+        memo[e] = build(*[memo[c] for c in children])
+    return memo[expr]
+
+
+def _rem_implies_step(e):
+    if isinstance(e,Implies):
+        return (e.left, e.right), lambda a, b: Or(Not(a), b)
+    if isinstance(e,Not):
+        return (e.expr,), Not
+    if isinstance(e,And):
+        return (e.left, e.right), And
+    if isinstance(e,Or):
+        return (e.left, e.right), Or
+    return (), lambda: e
+
+
+def _push_neg_step(e):
+    if isinstance(e,Not):
+        ins = e.expr
+        if isinstance(ins,Not):
+            return (ins.expr,), lambda a: a
+        if isinstance(ins,Const):
+            return (), lambda: Const(not ins.value)
+        if isinstance(ins,And):
+            return (Not(ins.left), Not(ins.right)), Or
+        if isinstance(ins,Or):
+            return (Not(ins.left), Not(ins.right)), And
+    elif isinstance(e,And):
+        return (e.left, e.right), And
+    elif isinstance(e,Or):
+        return (e.left, e.right), Or
+    return (), lambda: e
+
+
+def rem_implies(expr, memo=None):
+    return _transform(expr, _rem_implies_step, {} if memo is None else memo)
+
+
+def push_neg(expr, memo=None):
+    return _transform(expr, _push_neg_step, {} if memo is None else memo)
+
+
+def _strip(e, neg):
+    """Skips the negations on top of e; neg tells whether e is negated."""
+    while isinstance(e,Not):
+        e, neg = e.expr, not neg
+    return e, neg
+
+
+def _kind(e, neg):
+    """"and" / "or" for what e (not a Not) is in negation normal form."""
+    if isinstance(e,(Var,Const)):
+        return None
+    if isinstance(e,And):
+        return "or" if neg else "and"
+    return "and" if neg else "or"
+
+
+def _operands(e, neg):
+    """
+    Flattens the conjunction or disjunction e stands for. Returns its
+    kind and its distinct operands as (node, neg) pairs of a different
+    kind. A node shared in the DAG is expanded once.
+    """
+    kind = _kind(e, neg)
+    result, todo, seen = [], [(e, neg)], set()
+    while todo:
+        key = _strip(*todo.pop())
+        if key in seen:
+            continue
+        seen.add(key)
+        e, neg = key
+        if _kind(e, neg) != kind:
+            result.append((e, neg))
+        elif isinstance(e,Implies):
+            todo.extend(((e.right, neg), (e.left, not neg)))
+        else:
+            todo.extend(((e.right, neg), (e.left, neg)))
+    return kind, result
+
+
+def _product(lists):
+    """
+    Clauses of the disjunction of CNFs. Clauses are trees of parts here
+    (a literal or a tuple of clauses), so a combination costs O(1) and
+    literals are only collected once a clause is output.
+    """
+    if not all(lists):
+        return []       # one of the disjuncts is true
+    acc = [tuple(l[0] for l in lists if len(l) == 1)]
+    for l in lists:
+        if len(l) > 1:
+            acc = [(c, d) for c in acc for d in l]
+    return acc
+
+
+def _literals(clause) -> Set[str]:
+    lits, todo, seen = set(), [clause], set()
+    while todo:
+        c = todo.pop()
+        if isinstance(c, str):
+            lits.add(c)
+        elif id(c) not in seen:
+            seen.add(id(c))
+            todo.extend(c)
+    return lits
+
+
+def _clause_list(root):
+    """
+    Clause trees of the (node, neg) pair root. Every operand is converted
+    once and its clauses are dropped as soon as their last user is done.
+    """
+    ops, users, todo = {}, {}, [root]
+    while todo:
+        key = todo.pop()
+        if key in ops:
+            continue
+        e, neg = key
+        if _kind(e, neg) is None:
+            ops[key] = None
+            continue
+        ops[key] = _operands(e, neg)
+        for k in ops[key][1]:
+            users[k] = users.get(k, 0) + 1
+            todo.append(k)
+
+    done, stack = {}, [root]
+    while stack:
+        key = stack.pop()
+        if key in done:
+            continue
+        if ops[key] is None:
+            e, neg = key
+            if isinstance(e,Const):
+                # true: no clauses, false: the empty clause
+                done[key] = [] if e.value != neg else [()]
+            else:
+                done[key] = ["~" + e.name if neg else e.name]
+            continue
+        kind, operands = ops[key]
+        pending = [k for k in operands if k not in done]
+        if pending:
+            stack.append(key)
+            stack.extend(pending)
+            continue
+        lists = [done[k] for k in operands]
+        for k in operands:
+            users[k] -= 1
+            if users[k] == 0:
+                del done[k]
+        if kind == "and":
+            done[key] = [c for l in lists for c in l]
+        else:
+            done[key] = _product(lists)
+    return done[root]
+
+
+def _distribute(expr):
+    """
+    Yields the clauses distribute_or would give, one at a time. The
+    top-level conjunction is walked lazily, and so is the product of the
+    operands of each disjunction below it. Shared conjuncts are visited
+    once and a clause already yielded is not yielded again, so the output
+    follows the DAG rather than the tree it unfolds to.
+    """
+    todo, visited, produced = [(expr, False)], set(), set()
+
+    def new(clause):
+        key = frozenset(clause)
+        if key in produced:
+            return False
+        produced.add(key)
+        return True
+
+    while todo:
+        key = _strip(*todo.pop())
+        if key in visited:
+            continue
+        visited.add(key)
+        e, neg = key
+        if isinstance(e,Var):
+            clause = {"~" + e.name if neg else e.name}
+            if new(clause):
+                yield clause
+        elif isinstance(e,Const):
+            if e.value == neg and new(()):
+                yield set()
+        elif _kind(e, neg) == "and":
+            _, ops = _operands(e, neg)
+            todo.extend(reversed(ops))
+        else:
+            _, ops = _operands(e, neg)
+            for parts in itertools.product(*[_clause_list(k) for k in ops]):
+                clause = _literals(parts)
+                if new(clause):
+                    yield clause
+
+
 def distribute_or(expr):
-    if isinstance(expr,Var) or isinstance(expr,Not):
-        return expr
-    if isinstance(expr.left,Var) and isinstance(expr.right,Var):
-        return expr
-    if isinstance(expr,And):
-        return And(distribute_or(expr.left),distribute_or(expr.right))
-    else:
-        left = distribute_or(expr.left)
-        right = distribute_or(expr.right)
-        if isinstance(left,And):
-            return And(distribute_or(Or(left.left,right)), 
-                       distribute_or(Or(left.right,right)))
-        elif isinstance(right,And):
-            return And(distribute_or(Or(right.left,left)),
-                       distribute_or(Or(right.right,left)))
-        return Or(left,right)
-    
-    return expr
+    result = None
+    for clause in _distribute(expr):
+        disj = None
+        for lit in clause:
+            node = Not(Var(lit[1:])) if lit.startswith("~") else Var(lit)
+            disj = node if disj is None else Or(disj,node)
+        if disj is None:
+            disj = Const(False)
+        result = disj if result is None else And(result,disj)
+    return Const(True) if result is None else result
 
 def clauses(expr) -> List[Set[str]]:
-    if isinstance(expr,And):
-        return clauses(expr.left) + clauses(expr.right)
-    else:
-        return [get_literals(expr)]
+    result, todo = [], [expr]
+    while todo:
+        e = todo.pop()
+        if isinstance(e,And):
+            todo.extend((e.right, e.left))
+        elif not (isinstance(e,Const) and e.value):
+            result.append(get_literals(e))
+    return result
         
 
 def get_literals(e) -> Set[str]:
-    if isinstance(e,Var):
-        return {e.name}
-    if isinstance(e,Not):
-        return {"~" + e.expr.name}
-    if isinstance(e,Or):
-        return get_literals(e.left) | get_literals(e.right)
+    lits, todo = set(), [e]
+    while todo:
+        e = todo.pop()
+        if isinstance(e,Var):
+            lits.add(e.name)
+        elif isinstance(e,Not):
+            lits.add("~" + e.expr.name)
+        elif isinstance(e,Or):
+            todo.extend((e.right, e.left))
+    return lits
+
+
+def negate(lit: str) -> str:
+    return lit[1:] if lit.startswith("~") else "~" + lit
+
+
+def _definitional(expr, polarity: bool, aux: List[str]) -> Iterator[Set[str]]:
+    """Yields the clauses of tseitin(), appending auxiliary names to aux."""
+    names = set()
+    todo, visited = [expr], set()
+    while todo:
+        e = todo.pop()
+        if e in visited:
+            continue
+        visited.add(e)
+        if isinstance(e, Var):
+            names.add(e.name)
+        elif isinstance(e, Not):
+            todo.append(e.expr)
+        elif not isinstance(e, Const):
+            todo.extend((e.left, e.right))
+
+    defs = {}       # node -> [its variable, directions already defined]
+    counter = 0
+
+    def literal(e, sign: int) -> str:
+        """
+        Literal for e (negated if sign is -1); gates and constants get a
+        fresh variable.
+        """
+        nonlocal counter
+        e, neg = _strip(e, sign == -1)
+        if isinstance(e, Var):
+            lit = e.name
+        else:
+            if e not in defs:
+                counter += 1
+                while f"@t{counter}" in names:
+                    counter += 1
+                defs[e] = [f"@t{counter}", set()]
+                aux.append(f"@t{counter}")
+            lit = defs[e][0]
+        return negate(lit) if neg else lit
+
+    def define(e, pol: int) -> Iterator[Set[str]]:
+        """Clauses defining e and its subformulas in direction pol (1 or -1)."""
+        work = [(e, pol)]
+        while work:
+            e, pol = work.pop()
+            e, neg = _strip(e, pol == -1)
+            if isinstance(e, Var):
+                continue
+            x = literal(e, 1)
+            done = defs[e][1]
+            if isinstance(e, Const):
+                if not done:
+                    done.add(1)
+                    yield {x if e.value else negate(x)}
+                continue
+            for d in ((1, -1) if not polarity else (-1 if neg else 1,)):
+                if d in done:
+                    continue
+                done.add(d)
+                if isinstance(e, Implies):
+                    a = literal(e.left, -1)
+                    work.append((e.left, -d))
+                else:
+                    a = literal(e.left, 1)
+                    work.append((e.left, d))
+                b = literal(e.right, 1)
+                work.append((e.right, d))
+                if isinstance(e, And):
+                    if d == 1:
+                        yield {negate(x), a}
+                        yield {negate(x), b}
+                    else:
+                        yield {x, negate(a), negate(b)}
+                elif d == 1:
+                    yield {negate(x), a, b}
+                else:
+                    yield {x, negate(a)}
+                    yield {x, negate(b)}
+
+    # the top-level conjunction and the disjunctions right below it need
+    # no definitions of their own
+    todo, visited = [expr], set()
+    while todo:
+        c = todo.pop()
+        if c in visited:
+            continue
+        visited.add(c)
+        if isinstance(c, And):
+            todo.extend((c.right, c.left))
+            continue
+        clause, gates, parts, seen = set(), [], [(c, 1)], set()
+        while parts:
+            e, sign = parts.pop()
+            if (e, sign) in seen:
+                continue
+            seen.add((e, sign))
+            if isinstance(e, Or) and sign == 1:
+                parts.extend(((e.right, 1), (e.left, 1)))
+            elif isinstance(e, Implies) and sign == 1:
+                parts.extend(((e.right, 1), (e.left, -1)))
+            elif isinstance(e, Not):
+                parts.append((e.expr, -sign))
+            else:
+                clause.add(literal(e, sign))
+                gates.append((e, sign))
+        yield clause
+        for e, sign in gates:
+            yield from define(e, sign)
+
+
+def tseitin(expr, polarity: bool = False) -> Tuple[List[Set[str]], List[str]]:
+    """
+    Definitional CNF: every And / Or / Implies node below the top-level
+    clauses gets a fresh variable defined by a few clauses, so the output
+    grows linearly with the formula and is equisatisfiable with it (every
+    model of the result is a model of expr on the original variables).
+    polarity: Plaisted-Greenbaum, only emit the half of each definition
+    that the polarity of the node needs.
+    Returns (clauses, names of the auxiliary variables).
+    """
+    aux = []
+    return list(_definitional(expr, polarity, aux)), aux
+
+
+def iter_cnf(expr, mode="distribute") -> Iterator[Set[str]]:
+    """
+    Yields the clauses of to_cnf(expr, mode) one by one. Nothing recurses,
+    so arbitrarily deep formulas work, and the work is linear in the size
+    of the output.
+    """
+    if mode == "distribute":
+        return _distribute(expr)
+    if mode in ("tseitin", "pg"):
+        return _definitional(expr, mode == "pg", [])
+    raise ValueError(f"unknown mode: {mode}")
 
 
-def to_cnf(expr):
+def to_cnf(expr, mode="distribute"):
     """
     Converts a propositional logic expression to CNF.
     Returns a list of clauses, each clause is a set of literals.
+    mode: "distribute" gives an equivalent CNF, which can be exponentially
+          larger than expr; "tseitin" and "pg" (Plaisted-Greenbaum) give a
+          linear-size equisatisfiable one over extra variables "@t1",
+          "@t2", ... (see tseitin() for their names)
     """
-    expr1 = rem_implies(expr)
-    e2 = push_neg(expr1)
-    e3 = distribute_or(e2)
-    return clauses(e3)
-    raise NotImplementedError
\ No newline at end of file
+    return list(iter_cnf(expr, mode))
@@ -0,0 +1,212 @@
+"""
+Two-watched-literal unit propagation for the DPLL solver.
+
+Every clause watches two of its literals (the first two entries of its
+slice in the clause store). A clause can only become unit or conflicting
+once one of its watched literals is made false, so an assignment only
+visits the clauses watching the literal it falsifies.
+"""
+
+import time
+from array import array
+from typing import Dict, Optional
+
+from clause_db import ClauseDB
+from heuristics import make_heuristic
+from stats import Stats
+
+
+class WatchedFormula:
+    def __init__(self, clauses, heuristic="vsids", seed=None):
+        """
+        clauses: a ClauseDB or a list of sets of literals. A ClauseDB is
+                 owned by the solver from then on and changed in place:
+                 literals are reordered, learnt clauses appended and the
+                 arrays replaced by garbage collection. Pass a copy() to
+                 keep the original.
+        heuristic: branching heuristic name (see heuristics.HEURISTICS) or object
+        seed: random seed for the heuristic's tie-breaking
+        """
+        if not isinstance(clauses, ClauseDB):
+            clauses = ClauseDB.from_clauses(clauses)
+        self.db = clauses
+        self.val = [None, None]     # literal -> True / False / None (unassigned)
+        self.watches = [[], []]     # literal -> indices of clauses watching it
+        self.deleted = bytearray()  # clause index -> 1 once deleted
+        self.trail = []             # assigned literals in order
+        self.trail_lim = []         # trail position where each decision level starts
+        self.qhead = 0              # trail position of the next literal to propagate
+        self.phase = bytearray(1)   # var -> saved polarity (1 = negative)
+        if isinstance(heuristic, str):
+            heuristic = make_heuristic(heuristic, seed)
+        self.heuristic = heuristic
+        self.ok = True              # False once an empty clause has been seen
+        self.stats = Stats()
+        self.grow()
+        for ci in range(len(self.db)):
+            self.attach(ci)
+        self.heuristic.init(self)
+
+    def grow(self) -> None:
+        """Makes room for variables added to the clause store."""
+        extra = 2 * self.db.num_vars + 2 - len(self.val)
+        if extra > 0:
+            self.val.extend([None] * extra)
+            self.watches.extend([] for _ in range(extra))
+            self.phase.extend(bytes(extra // 2))
+            self.heuristic.grow(self.db.num_vars)
+
+    def lit(self, s: str) -> int:
+        """Encodes a literal name such as "~P", creating its variable if new."""
+        lit = self.db.lit(s)
+        self.grow()
+        return lit
+
+    def attach(self, ci: int) -> None:
+        """
+        Sets up the watches of clause ci. Must be called at decision
+        level 0, where the current assignment is permanent.
+        """
+        db = self.db
+        self.deleted.extend(bytes(ci + 1 - len(self.deleted)))
+        s, e = db.starts[ci], db.starts[ci + 1]
+        c = db.lits[s:e]
+        lits = set(c)
+        if any(l ^ 1 in lits for l in c):
+            self.deleted[ci] = 1    # tautology
+            return
+        # literals that are already false go to the back
+        val = self.val
+        if any(val[l] is False for l in c):
+            c = sorted(c, key=lambda l: val[l] is False)
+            db.lits[s:e] = array('i', c)
+        if not c or val[c[0]] is False:
+            self.ok = False
+        elif len(c) == 1 or val[c[1]] is False:
+            self.enqueue(c[0])
+        else:
+            self.watches[c[0]].append(ci)
+            self.watches[c[1]].append(ci)
+
+    def add_clause(self, c) -> int:
+        """Adds a clause of encoded literals. Returns its index."""
+        ci = self.db.add_clause(c)
+        self.grow()
+        self.attach(ci)
+        return ci
+
+    def enqueue(self, lit: int, reason: Optional[int] = None) -> bool:
+        """
+        Assigns lit true, reason being the clause that implied it (if any).
+        Returns False if lit is already false.
+        """
+        val = self.val[lit]
+        if val is not None:
+            return val
+        self.val[lit] = True
+        self.val[lit ^ 1] = False
+        self.trail.append(lit)
+        return True
+
+    def propagate(self) -> Optional[int]:
+        """
+        Propagates every pending trail literal.
+        Returns the index of a conflicting clause, or None.
+        """
+        lits = self.db.lits
+        starts = self.db.starts
+        watches = self.watches
+        val = self.val
+        deleted = self.deleted
+        trail = self.trail
+        start = time.perf_counter()
+        head = self.qhead
+        while self.qhead < len(trail):
+            false_lit = trail[self.qhead] ^ 1
+            self.qhead += 1
+            ws = watches[false_lit]
+            i = j = 0
+            n = len(ws)
+            while i < n:
+                ci = ws[i]
+                i += 1
+                if deleted[ci]:
+                    continue    # drop the watch
+                s = starts[ci]
+                if lits[s] == false_lit:
+                    lits[s] = lits[s + 1]
+                    lits[s + 1] = false_lit
+                first = lits[s]
+                if val[first] is True:
+                    ws[j] = ci
+                    j += 1
+                    continue
+                # look for a new literal to watch
+                for k in range(s + 2, starts[ci + 1]):
+                    l = lits[k]
+                    if val[l] is not False:
+                        lits[s + 1] = l
+                        lits[k] = false_lit
+                        watches[l].append(ci)
+                        break
+                else:
+                    ws[j] = ci
+                    j += 1
+                    if not self.enqueue(first, ci):
+                        # conflict: keep the remaining watchers
+                        while i < n:
+                            ws[j] = ws[i]
+                            i += 1
+                            j += 1
+                        del ws[j:]
+                        self.account(self.qhead - head, start)
+                        self.qhead = len(trail)
+                        return ci
+            del ws[j:]
+        self.account(self.qhead - head, start)
+        return None
+
+    def account(self, propagations: int, start: float) -> None:
+        stats = self.stats
+        stats.propagations += propagations
+        stats.propagate_time += time.perf_counter() - start
+
+    def decision_level(self) -> int:
+        return len(self.trail_lim)
+
+    def cancel_until(self, level: int) -> None:
+        """Backtracks the trail to the end of the given decision level."""
+        if len(self.trail_lim) > level:
+            self.undo(self.trail_lim[level])
+            del self.trail_lim[level:]
+
+    def decide(self, lit: int) -> None:
+        """Opens a new decision level with lit as its decision."""
+        self.trail_lim.append(len(self.trail))
+        self.stats.decisions += 1
+        self.enqueue(lit)
+
+    def pick_branch_lit(self) -> Optional[int]:
+        """The heuristic's variable, in its saved phase."""
+        v = self.heuristic.pick()
+        if v is None:
+            return None
+        return 2 * v | self.phase[v]
+
+    def undo(self, n: int) -> None:
+        """Unassigns every literal on the trail after position n."""
+        val = self.val
+        phase = self.phase
+        unassign = self.heuristic.unassign
+        for lit in self.trail[n:]:
+            val[lit] = None
+            val[lit ^ 1] = None
+            phase[lit >> 1] = lit & 1
+            unassign(lit >> 1)
+        del self.trail[n:]
+        self.qhead = n
+
+    def model(self) -> Dict[str, bool]:
+        val = self.val
+        return {name: val[2 * v] is True
+                for v, name in enumerate(self.db.names) if v}